@@ -0,0 +1,349 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import io
+import logging
+import os
+import random
+import re
+import sqlite3
+from collections import deque
+from pathlib import Path
+
+import yaml
+
+
+log = logging.getLogger(__name__)
+
+_NON_WORD = re.compile(r"[^a-z0-9+#]+")
+
+# typed when nothing knows the answer. It is never learned: the question goes
+# to qa.csv with an empty answer instead, for a rule or a hand edit to fill in.
+# Older versions learned it, `answers.py forget` clears those rows.
+FALLBACK_ANSWER = "4"
+
+
+def normalize(text: str) -> str:
+    # lowercase and turn punctuation runs into one space, padded so that
+    # " word " keywords can match at either end of the question
+    return " " + _NON_WORD.sub(" ", str(text).lower()).strip() + " "
+
+
+def normalize_keyword(keyword: str) -> str:
+    # same as normalize() but keeps the padding the rule author wrote
+    return _NON_WORD.sub(" ", str(keyword).lower())
+
+
+class KeywordMatcher:
+    # Aho-Corasick automaton: reports every keyword found in a text in a
+    # single pass, however many keywords are loaded.
+
+    def __init__(self, keywords) -> None:
+        self.goto: list = [{}]
+        self.fail: list = [0]
+        self.out: list = [set()]
+        for keyword in keywords:
+            self._add(keyword)
+        self._build()
+
+    def _add(self, keyword: str) -> None:
+        state = 0
+        for char in keyword:
+            if char not in self.goto[state]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append(set())
+                self.goto[state][char] = len(self.goto) - 1
+            state = self.goto[state][char]
+        self.out[state].add(keyword)
+
+    def _build(self) -> None:
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                self.out[child] |= self.out[self.fail[child]]
+
+    def find(self, text: str) -> set:
+        found: set = set()
+        state = 0
+        for char in text:
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            if self.out[state]:
+                found |= self.out[state]
+        return found
+
+
+class AnswerRules:
+    # Heuristic answers loaded from a YAML rule file. All keywords are compiled
+    # into one matcher; each rule is indexed under a single trigger keyword so
+    # only rules whose trigger appeared in the question are ever evaluated.
+
+    CACHE_SIZE = 4096
+
+    def __init__(self, path, context=None) -> None:
+        with open(path, 'r', encoding='utf-8') as stream:
+            rules: list = yaml.safe_load(stream).get('rules') or []
+        self.context: dict = context or {}
+        self.rules: list = [self._compile(rule) for rule in rules]
+        self.index: dict = {}
+        for priority, rule in enumerate(self.rules):
+            for keyword in rule['trigger']:
+                self.index.setdefault(keyword, []).append(priority)
+        self.matcher = KeywordMatcher({k for rule in self.rules for k in rule['keywords']})
+        self.cache: dict = {}
+        log.info("Loaded %s answer rules from %s", len(self.rules), path)
+
+    def _compile(self, rule: dict) -> dict:
+        groups = rule.get('any') or []
+        if groups and not isinstance(groups[0], list):
+            groups = [groups]
+        compiled: dict = {
+            'all': [normalize_keyword(k) for k in rule.get('all') or []],
+            'any': [[normalize_keyword(k) for k in group] for group in groups],
+            'none': [normalize_keyword(k) for k in rule.get('none') or []],
+            'answer': rule.get('answer'),
+            'choices': [self._text(c) for c in rule.get('choices') or []],
+        }
+        if not compiled['all'] and not compiled['any']:
+            raise ValueError(f"Answer rule needs 'all' or 'any' keywords: {rule}")
+        if compiled['answer'] is None and not compiled['choices']:
+            raise ValueError(f"Answer rule needs an 'answer' or 'choices': {rule}")
+        compiled['answer'] = self._text(compiled['answer'])
+        # one required keyword is enough to find the rule, a required group works too
+        compiled['trigger'] = compiled['all'][:1] or compiled['any'][0]
+        compiled['keywords'] = set(compiled['all'] + compiled['none']).union(*compiled['any'])
+        return compiled
+
+    @staticmethod
+    def _text(value):
+        if isinstance(value, bool):
+            return "Yes" if value else "No"
+        return None if value is None else str(value)
+
+    def answer(self, question: str) -> str | None:
+        key: str = normalize(question)
+        if key in self.cache:
+            return self.cache[key]
+
+        found: set = self.matcher.find(key)
+        candidates: set = {priority for keyword in found for priority in self.index.get(keyword, ())}
+        answer = None
+        for priority in sorted(candidates):
+            rule = self.rules[priority]
+            if (all(k in found for k in rule['all'])
+                    and all(any(k in found for k in group) for group in rule['any'])
+                    and not any(k in found for k in rule['none'])):
+                answer = random.choice(rule['choices']) if rule['choices'] else rule['answer']
+                if "{" in answer:
+                    answer = answer.format(**self.context)
+                break
+
+        if len(self.cache) >= self.CACHE_SIZE:
+            self.cache.clear()
+        self.cache[key] = answer
+        return answer
+
+
+def question_key(text: str) -> str:
+    # LinkedIn field text repeats the label, then adds "Required", the options
+    # and input hints on separate lines. The first line is the question itself.
+    for line in str(text).splitlines():
+        if line.strip():
+            return normalize(line).strip()
+    return ""
+
+
+class AnswerIndex:
+    # Learned answers from qa.csv keyed by question_key(). Checked before the
+    # heuristic rules so hand edited answers take precedence.
+
+    IGNORED_ANSWERS = {"", "nan", "user provided"}
+
+    def __init__(self) -> None:
+        self.answers: dict = {}
+        # questions seen without an answer, logged to qa.csv for filling in
+        self.unanswered: set = set()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    @classmethod
+    def from_csv(cls, path) -> AnswerIndex:
+        index = cls()
+        with open(path, 'r', newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            index.read(reader)
+        log.info("Loaded %s learned answers from %s", len(index), path)
+        return index
+
+    def read(self, rows) -> dict:
+        # later rows are newer, let them win; returns what was taken
+        taken: dict = {}
+        for row in rows:
+            if len(row) >= 2 and self.add(row[0], row[1]):
+                key: str = question_key(row[0])
+                taken[key] = self.answers[key]
+        return taken
+
+    def __len__(self) -> int:
+        return len(self.answers)
+
+    def __contains__(self, question) -> bool:
+        return question_key(question) in self.answers
+
+    def add(self, question: str, answer) -> bool:
+        key: str = question_key(question)
+        if not key or str(answer).strip().lower() in self.IGNORED_ANSWERS:
+            self.unanswered.add(key)
+            return False
+        self.answers[key] = str(answer).strip()
+        self.unanswered.discard(key)
+        return True
+
+    def get(self, question: str) -> str | None:
+        answer = self.answers.get(question_key(question))
+        if answer is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return answer
+
+    def stats(self) -> str:
+        lookups: int = self.hits + self.misses
+        rate: float = 100 * self.hits / lookups if lookups else 0
+        return f"{self.hits} hits, {self.misses} misses ({rate:.0f}% hit rate, {len(self)} answers known)"
+
+
+def forget(csv_path, answer: str) -> int:
+    # empty every answer equal to `answer` in qa.csv, so the rules answer those
+    # questions again and the rest are listed as unanswered
+    with open(csv_path, 'r', newline='', encoding='utf-8') as f:
+        rows: list = list(csv.reader(f))
+    forgotten: int = 0
+    for row in rows[1:]:
+        if len(row) >= 2 and row[1].strip() == answer:
+            row[1] = ""
+            forgotten += 1
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator='\n').writerows(rows)
+    temporary: str = f"{csv_path}.tmp"
+    with open(temporary, 'w', newline='', encoding='utf-8') as f:
+        f.write(buffer.getvalue())
+    os.replace(temporary, csv_path)
+    return forgotten
+
+
+class AnswerStore:
+    # Compact copy of qa.csv in SQLite: one row per canonical question, the
+    # newest answer winning, loaded in milliseconds. Questions still waiting
+    # for an answer are kept with an empty one. qa.csv stays the file the
+    # bot appends to and people edit. Lines appended since the last load are
+    # merged in; if the file was changed anywhere else it is read again in full.
+
+    def __init__(self, db_path) -> None:
+        self.db_path = Path(db_path)
+        self.db = sqlite3.connect(self.db_path, timeout=30)
+        self.db.execute("CREATE TABLE IF NOT EXISTS answers (key TEXT PRIMARY KEY, answer TEXT)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    @staticmethod
+    def digest(data: bytes) -> str:
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+    def load(self, csv_path) -> AnswerIndex:
+        csv_path = Path(csv_path)
+        data: bytes = csv_path.read_bytes() if csv_path.is_file() else b""
+        meta: dict = dict(self.db.execute("SELECT key, value FROM meta"))
+        offset: int = int(meta.get("csv_offset", 0))
+        index = AnswerIndex()
+        if offset and offset <= len(data) and self.digest(data[:offset]) == meta.get("csv_digest"):
+            for key, answer in self.db.execute("SELECT key, answer FROM answers ORDER BY rowid"):
+                if answer:
+                    index.answers[key] = answer
+                else:
+                    index.unanswered.add(key)
+        else:
+            # first load, or qa.csv was edited: it is the truth
+            self.db.execute("DELETE FROM answers")
+            offset = 0
+
+        # only whole lines, a half written row is picked up next time
+        end: int = data.rfind(b'\n') + 1
+        if end > offset:
+            reader = csv.reader(io.StringIO(data[offset:end].decode('utf-8', errors='replace'), newline=''))
+            if offset == 0:
+                next(reader, None)
+            taken: dict = index.read(reader)
+            self.db.executemany("INSERT INTO answers VALUES (?, ?) "
+                                "ON CONFLICT (key) DO UPDATE SET answer = excluded.answer", taken.items())
+            # never over an answer, the question is only logged unanswered when none is known
+            self.db.executemany("INSERT OR IGNORE INTO answers VALUES (?, '')",
+                                [(key,) for key in index.unanswered if key])
+            self._mark(data[:end])
+        log.info("Loaded %s learned answers from %s", len(index), self.db_path)
+        return index
+
+    def compact(self, csv_path) -> AnswerIndex:
+        # read qa.csv again from the start
+        self.db.execute("DELETE FROM meta")
+        return self.load(csv_path)
+
+    def export(self, csv_path) -> int:
+        # rewrite qa.csv with one line per question, for editing by hand;
+        # unanswered questions keep their empty answer to be filled in
+        rows: list = list(self.db.execute("SELECT key, answer FROM answers ORDER BY rowid"))
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        writer.writerow(["Question", "Answer"])
+        writer.writerows(rows)
+        data: bytes = buffer.getvalue().encode('utf-8')
+        temporary: str = f"{csv_path}.tmp"
+        with open(temporary, 'wb') as f:
+            f.write(data)
+        os.replace(temporary, csv_path)
+        self._mark(data)
+        return len(rows)
+
+    def close(self) -> None:
+        self.db.close()
+
+    def _mark(self, data: bytes) -> None:
+        # remember how much of qa.csv is already in the store
+        self.db.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                            [("csv_offset", str(len(data))), ("csv_digest", self.digest(data))])
+        self.db.commit()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compact the learned answers in qa.csv")
+    parser.add_argument("action", choices=["compact", "export", "forget"],
+                        help="compact: merge qa.csv into qa.db, one answer per question; "
+                             "export: compact, then rewrite qa.csv from qa.db; "
+                             "forget: empty every answer equal to --answer, then compact")
+    parser.add_argument("--answer", default=FALLBACK_ANSWER,
+                        help=f"answer to forget (default {FALLBACK_ANSWER!r}, the placeholder older versions saved)")
+    parser.add_argument("--csv", type=Path, default=Path("qa.csv"))
+    parser.add_argument("--db", type=Path, default=None, help="defaults to the CSV path with a .db suffix")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args.action == "forget":
+        print(f"Forgot {forget(args.csv, args.answer)} answers {args.answer!r} in {args.csv}")
+    store = AnswerStore(args.db or args.csv.with_suffix(".db"))
+    with open(args.csv, 'rb') as f:
+        lines: int = sum(1 for _ in f)
+    index = store.compact(args.csv)
+    print(f"{lines} lines in {args.csv}, {len(index)} distinct questions in {store.db_path}")
+    if args.action == "export":
+        print(f"Wrote {store.export(args.csv)} questions to {args.csv}")
+    store.close()
@@ -0,0 +1,465 @@
+from __future__ import annotations
+
+import logging
+import os
+from abc import ABC, abstractmethod
+import re
+import shutil
+from collections import Counter
+from pathlib import Path
+
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.remote.webelement import WebElement
+
+
+log = logging.getLogger(__name__)
+
+# where the resolved chromedriver path is remembered between runs
+DRIVER_CACHE = Path(".chromedriver-path")
+
+
+def resolve_driver(refresh: bool = False) -> str:
+    # Cached path first, then chromedriver on PATH, and only then a download.
+    # Once cached, starting the bot needs no network.
+    if not refresh and DRIVER_CACHE.is_file():
+        cached: str = DRIVER_CACHE.read_text().strip()
+        if os.access(cached, os.X_OK):
+            return cached
+    path = None if refresh else shutil.which("chromedriver")
+    if path is None:
+        from webdriver_manager.chrome import ChromeDriverManager
+        path = ChromeDriverManager().install()
+    DRIVER_CACHE.write_text(path)
+    log.info("Using chromedriver at %s", path)
+    return path
+
+
+class Browser(ABC):
+    # What EasyApplyBot needs from a browser. The method names follow
+    # Selenium's WebDriver so expected_conditions and WebDriverWait work
+    # against any backend. A backend missing one of the abstract methods
+    # fails when it is created, not halfway through an application.
+
+    @abstractmethod
+    def get(self, url) -> None:
+        raise NotImplementedError
+
+    @property
+    @abstractmethod
+    def current_url(self) -> str:
+        raise NotImplementedError
+
+    @property
+    @abstractmethod
+    def title(self) -> str:
+        raise NotImplementedError
+
+    @property
+    @abstractmethod
+    def page_source(self) -> str:
+        raise NotImplementedError
+
+    @abstractmethod
+    def find_element(self, by, value):
+        raise NotImplementedError
+
+    @abstractmethod
+    def find_elements(self, by, value) -> list:
+        raise NotImplementedError
+
+    @abstractmethod
+    def execute_script(self, script, *args):
+        raise NotImplementedError
+
+    @abstractmethod
+    def execute_async_script(self, script, *args):
+        raise NotImplementedError
+
+    def set_script_timeout(self, seconds) -> None:
+        pass
+
+    def set_window_size(self, width, height) -> None:
+        pass
+
+    def set_window_position(self, x, y) -> None:
+        pass
+
+    def maximize_window(self) -> None:
+        pass
+
+    def get_cookies(self) -> list:
+        return []
+
+    def add_cookie(self, cookie: dict) -> None:
+        pass
+
+    def block_urls(self, patterns) -> None:
+        # requests matching any of the wildcard patterns are never sent
+        pass
+
+    def quit(self) -> None:
+        pass
+
+
+class SeleniumBrowser(Browser):
+    # Chrome through Selenium. Anything not listed on Browser is passed
+    # straight to the driver.
+
+    def __init__(self, options, driver_path=None) -> None:
+        from selenium import webdriver
+        from selenium.common.exceptions import SessionNotCreatedException
+        from selenium.webdriver.chrome.service import Service as ChromeService
+        if driver_path is not None:
+            self.driver = webdriver.Chrome(service=ChromeService(driver_path), options=options)
+            return
+        try:
+            self.driver = webdriver.Chrome(service=ChromeService(resolve_driver()), options=options)
+        except SessionNotCreatedException as e:
+            # usually Chrome updated past the cached driver
+            log.warning("Cached chromedriver did not start (%s), fetching a matching one", e.msg)
+            self.driver = webdriver.Chrome(service=ChromeService(resolve_driver(refresh=True)), options=options)
+
+    def __getattr__(self, name):
+        return getattr(self.driver, name)
+
+    def get(self, url) -> None:
+        self.driver.get(url)
+
+    @property
+    def current_url(self) -> str:
+        return self.driver.current_url
+
+    @property
+    def title(self) -> str:
+        return self.driver.title
+
+    @property
+    def page_source(self) -> str:
+        return self.driver.page_source
+
+    def find_element(self, by, value):
+        return self.driver.find_element(by, value)
+
+    def find_elements(self, by, value) -> list:
+        return self.driver.find_elements(by, value)
+
+    def execute_script(self, script, *args):
+        return self.driver.execute_script(script, *args)
+
+    def execute_async_script(self, script, *args):
+        return self.driver.execute_async_script(script, *args)
+
+    def set_script_timeout(self, seconds) -> None:
+        self.driver.set_script_timeout(seconds)
+
+    def set_window_size(self, width, height) -> None:
+        self.driver.set_window_size(width, height)
+
+    def set_window_position(self, x, y) -> None:
+        self.driver.set_window_position(x, y)
+
+    def maximize_window(self) -> None:
+        self.driver.maximize_window()
+
+    def block_urls(self, patterns) -> None:
+        self.driver.execute_cdp_cmd("Network.enable", {})
+        self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(patterns)})
+
+    def get_cookies(self) -> list:
+        return self.driver.get_cookies()
+
+    def add_cookie(self, cookie: dict) -> None:
+        self.driver.add_cookie(cookie)
+
+    def quit(self) -> None:
+        self.driver.quit()
+
+
+def _xpath(by, value) -> str | None:
+    # the values of selenium's By, spelled out so the fake needs no webdriver import
+    if by == "xpath":
+        return value
+    if by == "id":
+        return f".//*[@id='{value}']"
+    if by == "name":
+        return f".//*[@name='{value}']"
+    if by == "tag name":
+        return f".//{value}"
+    if by == "class name":
+        return f".//*[contains(concat(' ', normalize-space(@class), ' '), ' {value} ')]"
+    return None
+
+
+def _find(browser, root, by, value) -> list:
+    path = _xpath(by, value)
+    if path is None:
+        nodes = root.cssselect(value)
+    else:
+        # absolute paths search the whole document, like a browser does
+        nodes = (root.getroottree() if path.startswith("/") else root).xpath(path)
+    return [FakeElement(browser, node) for node in nodes if hasattr(node, "tag")]
+
+
+class FakeElement(WebElement):
+    # WebElement over an lxml node of the fake page. Subclassed rather than
+    # imitated, expected_conditions only takes a WebElement as an element and
+    # unpacks anything else as a locator.
+
+    def __init__(self, browser, node) -> None:
+        super().__init__(browser, str(id(node)))
+        self.browser = browser
+        self.node = node
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, FakeElement) and other.node is self.node
+
+    def __hash__(self) -> int:
+        return id(self.node)
+
+    @property
+    def tag_name(self) -> str:
+        return self.node.tag
+
+    @property
+    def text(self) -> str:
+        self.browser.commands["text"] += 1
+        lines = (re.sub(r"[ \t]+", " ", line).strip() for line in self.node.text_content().splitlines())
+        return "\n".join(line for line in lines if line)
+
+    def get_attribute(self, name):
+        self.browser.commands["get_attribute"] += 1
+        if name == "value" and self.node.tag == "textarea":
+            return self.node.text or ""
+        return self.node.get(name)
+
+    def find_element(self, by, value):
+        elements = self.find_elements(by, value)
+        if not elements:
+            raise NoSuchElementException(f"{by}={value}")
+        return elements[0]
+
+    def find_elements(self, by, value) -> list:
+        self.browser.commands["find_elements"] += 1
+        return _find(self.browser, self.node, by, value)
+
+    def is_displayed(self) -> bool:
+        return "hidden" not in self.node.attrib
+
+    def is_enabled(self) -> bool:
+        return "disabled" not in self.node.attrib
+
+    def is_selected(self) -> bool:
+        return "checked" in self.node.attrib or "selected" in self.node.attrib
+
+    def click(self) -> None:
+        self.browser.commands["click"] += 1
+        self.browser.clicks.append(self)
+        if self.node.get("href"):
+            self.browser.get(self.node.get("href"))
+        elif self.browser.on_click is not None:
+            self.browser.on_click(self.browser, self)
+
+    def clear(self) -> None:
+        self.browser.commands["clear"] += 1
+        self.node.set("value", "")
+
+    def send_keys(self, *keys) -> None:
+        self.browser.commands["send_keys"] += 1
+        # Keys.* specials live in the private use area \ue000-\ue0ff, they do not type anything
+        typed = "".join(key for key in map(str, keys) if not (key and "\ue000" <= key[0] <= "\ue0ff"))
+        self.node.set("value", (self.node.get("value") or "") + typed)
+
+
+class FakeBrowser(Browser):
+    # In-memory DOM that serves HTML fixtures, so the bot can be profiled and
+    # regression tested without Chrome or a LinkedIn account.
+    #
+    # fixtures maps a URL regex to HTML, or to a callable taking the URL and
+    # returning HTML. The page scripts of the bot are emulated in Python (see
+    # page_scripts); any other script returns None. Every call is counted in
+    # self.commands.
+
+    def __init__(self, fixtures: dict, scripts: dict | None = None, on_click=None) -> None:
+        self.fixtures: list = [(re.compile(pattern), page) for pattern, page in fixtures.items()]
+        self.scripts: dict = page_scripts() if scripts is None else scripts
+        self.on_click = on_click
+        self.commands: Counter = Counter()
+        self.clicks: list = []
+        self.cookies: list = []
+        self.url: str = "about:blank"
+        self.document = None
+        self.load("<html><head><title></title></head><body></body></html>")
+
+    def load(self, html: str) -> None:
+        import lxml.html
+        self.document = lxml.html.document_fromstring(html)
+
+    def get(self, url) -> None:
+        self.commands["get"] += 1
+        for pattern, page in self.fixtures:
+            if pattern.search(url):
+                self.url = url
+                self.load(page(url) if callable(page) else page)
+                return
+        log.warning("No fixture for %s", url)
+        self.url = url
+        self.load("<html><head><title>404</title></head><body></body></html>")
+
+    @property
+    def current_url(self) -> str:
+        self.commands["current_url"] += 1
+        return self.url
+
+    @property
+    def title(self) -> str:
+        self.commands["title"] += 1
+        title = self.document.find(".//title")
+        return "" if title is None else (title.text or "")
+
+    @property
+    def page_source(self) -> str:
+        import lxml.html
+        self.commands["page_source"] += 1
+        return lxml.html.tostring(self.document, encoding="unicode")
+
+    def find_element(self, by, value):
+        elements = self.find_elements(by, value)
+        if not elements:
+            raise NoSuchElementException(f"{by}={value}")
+        return elements[0]
+
+    def find_elements(self, by, value) -> list:
+        self.commands["find_elements"] += 1
+        return _find(self, self.document, by, value)
+
+    def execute_script(self, script, *args):
+        self.commands["execute_script"] += 1
+        handler = self.scripts.get(script)
+        return handler(self, *args) if handler else None
+
+    def get_cookies(self) -> list:
+        return list(self.cookies)
+
+    def add_cookie(self, cookie: dict) -> None:
+        self.cookies.append(dict(cookie))
+
+    def execute_async_script(self, script, *args):
+        self.commands["execute_async_script"] += 1
+        handler = self.scripts.get(script)
+        return handler(self, *args) if handler else None
+
+
+# Python versions of the scripts the bot runs in the page
+
+def _class_text(node, *classes) -> str:
+    for name in classes:
+        found = node.xpath(f".//*[contains(concat(' ', normalize-space(@class), ' '), ' {name} ')]")
+        if found:
+            return found[0].text_content().strip()
+    return ""
+
+
+def _form_fields(browser) -> list:
+    root = browser.document
+    modal = root.xpath(".//*[contains(concat(' ', normalize-space(@class), ' '), ' jobs-easy-apply-modal ')]")
+    return (modal[0] if modal else root).xpath(
+        ".//*[contains(concat(' ', normalize-space(@class), ' '), ' jobs-easy-apply-form-section__grouping ')]")
+
+
+def _choices(field) -> list:
+    return field.xpath(".//input[@type='radio' or @type='checkbox']")
+
+
+def fake_job_cards(browser) -> list:
+    cards: list = []
+    for node in browser.document.xpath("//div[@data-job-id]"):
+        states = [s.text_content().strip() for s in node.xpath(
+            ".//li[contains(@class, 'job-card-container__footer-job-state')]")]
+        dismiss = node.xpath(".//button[starts-with(@aria-label, 'Dismiss')]")
+        cards.append({
+            "jobID": node.get("data-job-id"),
+            "title": _class_text(node, "job-card-list__title", "job-card-container__link"),
+            "company": _class_text(node, "job-card-container__primary-description", "artdeco-entity-lockup__subtitle"),
+            "location": _class_text(node, "job-card-container__metadata-item", "artdeco-entity-lockup__caption"),
+            "applied": "Applied" in states,
+            "promoted": re.search(r"\bPromoted\b", node.text_content()) is not None,
+            "dismiss": FakeElement(browser, dismiss[0]) if dismiss else None,
+        })
+    return cards
+
+
+def fake_form_schema(browser) -> list:
+    form: list = []
+    for index, field in enumerate(_form_fields(browser)):
+        choices = _choices(field)
+        select = field.xpath(".//select")
+        text = field.xpath(".//input[@type='text' or not(@type)]")
+        textarea = field.xpath(".//textarea")
+        schema = {"index": index, "question": FakeElement(browser, field).text, "type": "unknown",
+                  "options": [], "value": None}
+        if choices:
+            schema["type"] = choices[0].get("type")
+            for choice in choices:
+                label = field.xpath(f".//label[@for='{choice.get('id')}']")
+                schema["options"].append({"value": choice.get("value") or "",
+                                          "label": (label[0].text_content() if label else choice.get("value") or "").strip(),
+                                          "checked": "checked" in choice.attrib})
+        elif select:
+            options = select[0].xpath(".//option")
+            schema["type"] = "select"
+            schema["options"] = [{"value": o.get("value") or "", "label": o.text_content().strip()} for o in options]
+            chosen = [o for o in options if "selected" in o.attrib] or options[:1]
+            schema["value"] = chosen[0].get("value") if chosen else None
+        elif text:
+            schema["type"] = "text"
+            schema["value"] = text[0].get("value") or ""
+        elif textarea:
+            schema["type"] = "textarea"
+            schema["value"] = textarea[0].text or ""
+        form.append(schema)
+    return form
+
+
+def fake_fill_form(browser, actions) -> int:
+    fields = _form_fields(browser)
+    filled: int = 0
+    for action in actions:
+        if action["index"] >= len(fields):
+            continue
+        field = fields[action["index"]]
+        if action["type"] == "text":
+            field.xpath(".//input[@type='text' or not(@type)]")[0].set("value", action["value"])
+        elif action["type"] == "textarea":
+            field.xpath(".//textarea")[0].text = action["value"]
+        elif action["type"] == "select":
+            for i, option in enumerate(field.xpath(".//select//option")):
+                option.attrib.pop("selected", None)
+                if i == action["option"]:
+                    option.set("selected", "selected")
+        else:
+            choices = _choices(field)
+            if action["type"] == "radio":
+                for choice in choices:
+                    choice.attrib.pop("checked", None)
+            choices[action["option"]].set("checked", "checked")
+        filled += 1
+    return filled
+
+
+def fake_scroll_results(browser, *args) -> dict:
+    cards: int = len(browser.document.xpath("//div[@data-job-id]"))
+    return {"cards": cards, "scrolls": 1, "ms": 0}
+
+
+def page_scripts() -> dict:
+    # imported here, the bot module imports this one
+    import easyapplybot
+    import waits
+    return {
+        easyapplybot.JOB_CARDS_SCRIPT: fake_job_cards,
+        easyapplybot.FORM_SCHEMA_SCRIPT: fake_form_schema,
+        easyapplybot.FILL_FORM_SCRIPT: fake_fill_form,
+        easyapplybot.RESULTS_SCROLL_SCRIPT: fake_scroll_results,
+        waits.IDLE_SCRIPT: lambda browser, *args: True,
+        "return document.readyState": lambda browser: "complete",
+    }
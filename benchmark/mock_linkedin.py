@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import html
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+# Local stand-in for the parts of LinkedIn the bot touches: login, search
+# results, job pages and a three step Easy Apply modal. Class names, ids and
+# aria-labels match EasyApplyBot.locator and the bot's page scripts.
+
+PAGE_SIZE = 25
+SESSION_COOKIE = "li_at"
+
+LOGIN_PAGE = """<!DOCTYPE html>
+<html><head><title>LinkedIn Login</title></head><body>
+<form action="/feed" method="get">
+  <input id="username" name="session_key" type="text">
+  <input id="password" name="session_password" type="password">
+  <button type="submit">Sign in</button>
+</form>
+</body></html>"""
+
+FEED_PAGE = """<!DOCTYPE html>
+<html><head><title>Feed | LinkedIn</title></head><body><main>Welcome back</main></body></html>"""
+
+CARD = """
+<li><div class="job-card-container" data-job-id="{id}">
+  <a class="job-card-container__link job-card-list__title" href="/jobs/view/{id}/"><strong>{title}</strong></a>
+  <div class="artdeco-entity-lockup__subtitle">{company}</div>
+  <ul><li class="job-card-container__metadata-item">{location}</li></ul>
+  <ul>{state}</ul>
+  <button aria-label="Dismiss {title} job" onclick="this.closest('li').remove()">x</button>
+</div></li>"""
+
+SEARCH_PAGE = """<!DOCTYPE html>
+<html><head><title>{keywords} Jobs | LinkedIn</title></head><body>
+<div class="jobs-search-results-list" style="height: 600px; overflow-y: auto">
+  <ul>{cards}</ul>
+</div>
+{banner}
+</body></html>"""
+
+NO_RESULTS = '<div class="jobs-search-no-results-banner">No matching jobs found.</div>'
+
+JOB_PAGE = """<!DOCTYPE html>
+<html><head><title>{title} | {company} | LinkedIn</title>
+<style>@font-face {{ font-family: Sans; src: url(/static/sans.woff2); }} body {{ font-family: Sans; }}</style>
+</head><body>
+<div class="jobs-unified-top-card">
+  <img src="/static/logo-{id}.png" alt="{company}">
+  <h1>{title}</h1>
+  <div id="apply-slot">{button}</div>
+</div>
+<div id="modal-slot"></div>
+<script>
+var step = 0;
+var field = function (id, question, control) {{
+    return '<div class="jobs-easy-apply-form-section__grouping"><label for="' + id + '">' + question +
+           '</label>' + control + '</div>';
+}};
+var prefix = 'urn:li:fsd_formElement:urn:li:jobs_applyformcommon_easyApplyFormElement:{id}:';
+var steps = [
+    field('phone', 'Mobile phone number', '<input id="phone" type="text" required>'),
+    field('single-line-text-form-component-formElement-urn-li-jobs-applyformcommon-easyApplyFormElement-1',
+          'How many years of work experience do you have with Python?',
+          '<input id="single-line-text-form-component-formElement-urn-li-jobs-applyformcommon-easyApplyFormElement-1" type="text" required>') +
+    '<div class="jobs-easy-apply-form-section__grouping"><fieldset><legend>Are you legally authorized to work in the United States?</legend>' +
+    '<input type="radio" name="auth" id="' + prefix + 'yes" value="Yes" required><label for="' + prefix + 'yes">Yes</label>' +
+    '<input type="radio" name="auth" id="' + prefix + 'no" value="No"><label for="' + prefix + 'no">No</label></fieldset></div>' +
+    field('english', 'What is your level of proficiency in English?',
+          '<select id="english" required><option value="">Select an option</option><option>Native or bilingual</option>' +
+          '<option>Professional</option><option>None</option></select>') +
+    field('why', 'Why do you want this position?', '<textarea id="why" required></textarea>'),
+    '<h3>Review your application</h3>'
+];
+var buttons = [
+    '<button aria-label="Continue to next step" onclick="advance()">Next</button>',
+    '<button aria-label="Review your application" onclick="advance()">Review</button>',
+    '<label for="follow-company-checkbox"><input type="checkbox" id="follow-company-checkbox" checked>Follow {company}</label>' +
+    '<button aria-label="Submit application" onclick="submitApplication()">Submit application</button>'
+];
+var render = function () {{
+    document.getElementById('modal-slot').innerHTML =
+        '<div class="jobs-easy-apply-modal" role="dialog"><form onsubmit="return false">' + steps[step] +
+        '</form>' + buttons[step] + '</div>';
+}};
+var openModal = function () {{
+    document.getElementById('apply-slot').innerHTML = '';
+    render();
+}};
+var advance = function () {{
+    var missing = Array.from(document.querySelectorAll('.jobs-easy-apply-modal [required]')).filter(function (input) {{
+        if (input.type === 'radio') {{
+            return !document.querySelector('input[name="' + input.name + '"]:checked');
+        }}
+        return !input.value;
+    }});
+    document.querySelectorAll('.artdeco-inline-feedback__message').forEach(function (e) {{ e.remove(); }});
+    if (missing.length) {{
+        missing.forEach(function (input) {{
+            var message = document.createElement('span');
+            message.className = 'artdeco-inline-feedback__message';
+            message.textContent = 'Please enter a valid answer';
+            input.closest('.jobs-easy-apply-form-section__grouping').appendChild(message);
+        }});
+        return;
+    }}
+    step++;
+    // a small delay, like the real modal fetching the next step
+    setTimeout(render, {delay});
+}};
+var submitApplication = function () {{
+    setTimeout(function () {{
+        document.getElementById('modal-slot').innerHTML =
+            '<div role="dialog"><h2>Your application was sent to {company}!</h2></div>';
+        fetch('/applied/{id}', {{method: 'POST'}});
+    }}, {delay});
+}};
+</script>
+</body></html>"""
+
+EASY_APPLY_BUTTON = '<button class="jobs-apply-button artdeco-button" onclick="openModal()">Easy Apply</button>'
+APPLY_BUTTON = '<button class="jobs-apply-button artdeco-button">Apply</button>'
+
+
+class MockLinkedIn:
+    # `jobs` postings per search, every 7th already applied to, every 5th
+    # without Easy Apply. Job pages load a logo and a font that take
+    # `asset_delay_ms` to arrive, like LinkedIn's media. Runs in a background thread.
+
+    def __init__(self, jobs: int = 60, delay_ms: int = 150, port: int = 0, asset_delay_ms: int = 400) -> None:
+        self.jobs = jobs
+        self.delay_ms = delay_ms
+        self.asset_delay_ms = asset_delay_ms
+        self.assets: int = 0
+        self.submitted: set = set()
+        self.requests: int = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def start(self) -> MockLinkedIn:
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def job(self, n: int) -> dict:
+        return {"id": 4000000000 + n, "title": f"Software Engineer {n}", "company": f"Company {n % 11}",
+                "location": "Remote", "applied": n % 7 == 3, "easy_apply": n % 5 != 4}
+
+    def search_page(self, query: dict) -> str:
+        start = int(query.get("start", ["0"])[0] or 0)
+        jobs = [self.job(n) for n in range(start, min(start + PAGE_SIZE, self.jobs))]
+        cards = "".join(CARD.format(id=job["id"], title=job["title"], company=job["company"], location=job["location"],
+                                    state='<li class="job-card-container__footer-job-state">Applied</li>'
+                                    if job["applied"] else "")
+                        for job in jobs)
+        return SEARCH_PAGE.format(keywords=html.escape(query.get("keywords", [""])[0]), cards=cards,
+                                  banner="" if jobs else NO_RESULTS)
+
+    def job_page(self, jobID: int) -> str | None:
+        n = jobID - 4000000000
+        if not 0 <= n < self.jobs:
+            return None
+        job = self.job(n)
+        button = EASY_APPLY_BUTTON if job["easy_apply"] and jobID not in self.submitted else APPLY_BUTTON
+        return JOB_PAGE.format(id=jobID, title=job["title"], company=job["company"], button=button,
+                               delay=self.delay_ms)
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args) -> None:
+                pass
+
+            def _send(self, body: str | bytes | None, status: int = 200, content_type: str = "text/html; charset=utf-8") -> None:
+                data = body if isinstance(body, bytes) else (body or "<html><head><title>Not found</title></head></html>").encode("utf-8")
+                self.send_response(status if body is not None else 404)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _redirect(self, location: str, cookie: str | None = None) -> None:
+                self.send_response(302)
+                self.send_header("Location", location)
+                if cookie is not None:
+                    self.send_header("Set-Cookie", cookie)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_GET(self) -> None:
+                mock.requests += 1
+                url = urlparse(self.path)
+                job = re.match(r"/jobs/view/(\d+)", url.path)
+                if url.path.startswith("/login"):
+                    self._send(LOGIN_PAGE)
+                elif url.path.startswith("/feed"):
+                    if "session_key" in parse_qs(url.query):
+                        # the login form, sign in and land on the feed
+                        self._redirect("/feed/", cookie=f"{SESSION_COOKIE}=mock; Path=/")
+                    elif f"{SESSION_COOKIE}=" not in (self.headers.get("Cookie") or ""):
+                        # signed out visitors are sent to the login page, like LinkedIn does
+                        self._redirect("/login")
+                    else:
+                        self._send(FEED_PAGE)
+                elif url.path.startswith("/jobs/search"):
+                    self._send(mock.search_page(parse_qs(url.query)))
+                elif job:
+                    self._send(mock.job_page(int(job.group(1))))
+                elif url.path.startswith("/static/"):
+                    mock.assets += 1
+                    # not time.sleep, the benchmark counts the bot's sleeps by patching it
+                    threading.Event().wait(mock.asset_delay_ms / 1000)
+                    self._send(bytes(20000), content_type="application/octet-stream")
+                else:
+                    self._send(None)
+
+            def do_POST(self) -> None:
+                mock.requests += 1
+                applied = re.match(r"/applied/(\d+)", self.path)
+                if applied:
+                    mock.submitted.add(int(applied.group(1)))
+                self._send("")
+
+        return Handler
+
+
+if __name__ == '__main__':
+    server = MockLinkedIn().start()
+    print(f"Mock LinkedIn listening on {server.url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from selenium.common.exceptions import ElementClickInterceptedException, InvalidSessionIdException
+from selenium.webdriver.support import expected_conditions as EC
+
+from backend import Browser, FakeBrowser, FakeElement
+from easyapplybot import EasyApplyBot
+from jobstore import JobQueue
+from mock_linkedin import MockLinkedIn
+
+
+# Checks the bot against backend.FakeBrowser serving the mock's pages, no
+# Chrome or server needed. Exits non-zero on the first check that fails.
+
+EASY_APPLY: int = 4000000000
+NO_EASY_APPLY: int = 4000000004
+
+
+def check(condition, message: str) -> None:
+    if not condition:
+        sys.exit(f"FAIL {message}")
+    print(f"ok   {message}")
+
+
+def failing_search(bot, error, fail_on: int) -> list:
+    # one search over the mock's results where opening the fail_on-th job raises `error`
+    opened: list = []
+
+    def apply_to_job(jobID) -> bool:
+        bot.get_job_page(jobID)
+        opened.append(jobID)
+        if len(opened) == fail_on:
+            raise error
+        return True
+
+    bot.apply_to_job = apply_to_job
+    bot.applications_loop("Engineer", "&location=Remote", budget=60)
+    return opened
+
+
+def failing_drain(bot, error, fail_on: int) -> JobQueue:
+    # drains a queue of the mock's jobs where the fail_on-th application raises `error`
+    jobs = JobQueue(bot.appliedJobIDs.db_path)
+    jobs.push([{"jobID": 4000000000 + n} for n in range(5)], "Engineer", "Remote")
+    opened: list = []
+
+    def apply_to_job(jobID) -> bool:
+        opened.append(jobID)
+        if len(opened) == fail_on:
+            raise error
+        return True
+
+    bot.apply_to_job = apply_to_job
+    bot.drain_queue(jobs)
+    return jobs
+
+
+def main() -> None:
+    mock = MockLinkedIn(jobs=10)
+    # only its pages are used, the server never starts
+    mock.server.server_close()
+    browser = FakeBrowser({r"/jobs/view/(\d+)": lambda url: mock.job_page(int(url.rstrip("/").split("/")[-1])),
+                           r"/jobs/search": lambda url: mock.search_page(parse_qs(urlparse(url).query))})
+
+    class Incomplete(Browser):
+        def get(self, url) -> None:
+            pass
+    try:
+        Incomplete()
+        created = True
+    except TypeError:
+        created = False
+    check(not created, "a backend missing Browser methods cannot be created")
+
+    workdir = tempfile.mkdtemp(prefix="easyapply-offline-")
+    shutil.copy(ROOT / "answers.yaml", workdir)
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        bot = EasyApplyBot(None, None, "5555555555", "100000", "50", filename="output.csv", browser=browser)
+
+        bot.get_job_page(EASY_APPLY)
+        button = bot.get_easy_apply_button()
+        check(isinstance(button, FakeElement), "the Easy Apply button is found")
+        check(bot.waiter.until(EC.element_to_be_clickable(button), timeout=1) == button,
+              "expected_conditions take a fake element as an element")
+        check(bot.waiter.element(bot.locator["easy_apply_button"], timeout=1, clickable=True) == button,
+              "PageWaiter waits for a clickable fake element")
+
+        bot.get_job_page(NO_EASY_APPLY)
+        check(bot.get_easy_apply_button() is False, "a job without Easy Apply has no button")
+        check(bot.apply_to_job(NO_EASY_APPLY) is False, "applying to it is recorded as not applied")
+        bot.results_log.flush()
+        check(str(NO_EASY_APPLY) in bot.appliedJobIDs, "the job is remembered as handled")
+
+        bot = EasyApplyBot(None, None, "5555555555", "100000", "50", filename="intercepted.csv", browser=browser)
+        try:
+            failing_search(bot, ElementClickInterceptedException("another element would receive the click"), 2)
+            survived = True
+        except ElementClickInterceptedException:
+            survived = False
+        check(survived, "an intercepted click does not end the search")
+        bot = EasyApplyBot(None, None, "5555555555", "100000", "50", filename="failed.csv", browser=browser)
+        new: set = {str(job["id"]) for job in map(mock.job, range(mock.jobs)) if not job["applied"]}
+        opened = failing_search(bot, IndexError("list index out of range"), 2)
+        check(set(opened) == new, "the jobs after a failed one are still applied to")
+        check(str(opened[1]) not in bot.appliedJobIDs and len(opened) == len(new),
+              "the failed job's claim is released but it is not retried this run")
+        bot = EasyApplyBot(None, None, "5555555555", "100000", "50", filename="queue.csv", browser=browser)
+        jobs = failing_drain(bot, IndexError("list index out of range"), 2)
+        failed = jobs.db.execute("SELECT job_id FROM queue WHERE result = 'failed'").fetchall()
+        check(jobs.pending() == 0 and len(failed) == 1, "a failed application does not stop the queue")
+        check(failed[0][0] not in bot.appliedJobIDs, "the failed job's claim is released")
+        applying = threading.Event()
+        start: float = time.time()
+        bot.enqueue_jobs(jobs, {"4000000009": {"jobID": "4000000009"}}, "Engineer", "Remote", 0, applying)
+        check(time.time() - start < 1 and jobs.pending() == 1,
+              "discovery stops waiting on the queue when no applier is left")
+
+        bot = EasyApplyBot(None, None, "5555555555", "100000", "50", filename="lost.csv", browser=browser)
+        try:
+            failing_search(bot, InvalidSessionIdException("invalid session id"), 2)
+            survived = True
+        except InvalidSessionIdException:
+            survived = False
+        check(not survived, "a lost browser session ends the search")
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    # the bot's own logging stays off, only the checks are printed
+    main()
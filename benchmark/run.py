@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from backend import SeleniumBrowser
+from easyapplybot import EasyApplyBot, setupLogger
+from mock_linkedin import MockLinkedIn
+
+
+# End-to-end throughput of EasyApplyBot.start_apply against the local mock.
+# Every run is appended to results.jsonl with the commit it ran on, so changes
+# to waiting, scrolling or form filling can be compared run over run.
+
+
+def git_commit() -> str:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except OSError:
+        return "unknown"
+
+
+class Counters:
+    # counts WebDriver commands and the time spent in time.sleep
+    def __init__(self) -> None:
+        self.commands: int = 0
+        self.slept: float = 0.0
+
+    def count_commands(self, driver) -> None:
+        execute = driver.execute
+
+        def counted(command, params=None):
+            self.commands += 1
+            return execute(command, params)
+        driver.execute = counted
+
+    def count_sleeps(self) -> None:
+        sleep = time.sleep
+
+        def counted(seconds):
+            self.slept += seconds
+            sleep(seconds)
+        time.sleep = counted
+
+
+def js_heap_mb(browser) -> float | None:
+    # JavaScript heap of the open page, a rough measure of the session's memory
+    try:
+        browser.driver.execute_cdp_cmd("Performance.enable", {})
+        metrics = browser.driver.execute_cdp_cmd("Performance.getMetrics", {})["metrics"]
+        return round(next(m["value"] for m in metrics if m["name"] == "JSHeapUsedSize") / 2 ** 20, 1)
+    except Exception:
+        return None
+
+
+def run(args) -> dict:
+    server = MockLinkedIn(jobs=args.jobs, delay_ms=args.delay_ms).start()
+    workdir = tempfile.mkdtemp(prefix="easyapply-bench-")
+    shutil.copy(ROOT / "answers.yaml", workdir)
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    counters = Counters()
+    try:
+        EasyApplyBot.BASE_URL = server.url
+        EasyApplyBot.MAX_SEARCH_TIME = args.search_time
+        options = EasyApplyBot.browser_options(lean=args.lean)
+        if not args.headed and not args.lean:
+            options.add_argument("--headless=new")
+        browser = SeleniumBrowser(options)
+        counters.count_commands(browser.driver)
+        counters.count_sleeps()
+
+        bot = EasyApplyBot(None, None, "5555555555", "100000", "50", filename="output.csv", browser=browser,
+                           lean=args.lean)
+        start: float = time.time()
+        bot.start_linkedin("bench", "bench")
+        login: float = time.time() - start
+
+        start = time.time()
+        bot.start_apply(args.positions, args.locations)
+        elapsed: float = time.time() - start
+        heap: float = js_heap_mb(browser)
+        browser.quit()
+
+        attempts: int = 0
+        if os.path.isfile("output.csv"):
+            with open("output.csv", newline="", encoding="utf-8") as f:
+                attempts = sum(1 for _ in csv.reader(f))
+    finally:
+        os.chdir(cwd)
+        server.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    applied: int = len(server.submitted)
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "jobs": args.jobs,
+        "delay_ms": args.delay_ms,
+        "search_time": args.search_time,
+        "login_s": round(login, 2),
+        "elapsed_s": round(elapsed, 2),
+        "applications": applied,
+        "attempts": attempts,
+        "jobs_per_hour": round(applied / elapsed * 3600, 1) if elapsed else 0,
+        "s_per_application": round(elapsed / applied, 2) if applied else None,
+        "commands_per_application": round(counters.commands / applied, 1) if applied else None,
+        "commands": counters.commands,
+        "sleep_s": round(counters.slept, 2),
+        "wait_s": round(bot.waiter.waited, 2),
+        "lean": args.lean,
+        "job_page_s": round(bot.metrics.phase_seconds["job_page"] / attempts, 2) if attempts else None,
+        "assets_loaded": server.assets,
+        "js_heap_mb": heap,
+    }
+
+
+def previous(results: Path, record: dict) -> dict | None:
+    if not results.is_file():
+        return None
+    same: list = []
+    with open(results, encoding="utf-8") as f:
+        for line in f:
+            past = json.loads(line)
+            if all(past.get(k, False) == record[k] for k in ("jobs", "delay_ms", "search_time", "lean")):
+                same.append(past)
+    return same[-1] if same else None
+
+
+def report(record: dict, before: dict | None) -> None:
+    print(f"\nBenchmark at {record['commit']}")
+    for key in ("login_s", "elapsed_s", "applications", "attempts", "jobs_per_hour", "s_per_application",
+                "commands_per_application", "commands", "sleep_s", "wait_s", "job_page_s", "assets_loaded",
+                "js_heap_mb"):
+        line = f"  {key:<26}{record[key]!s:>10}"
+        if before is not None and isinstance(record[key], (int, float)) and isinstance(before.get(key), (int, float)):
+            line += f"   was {before[key]} at {before['commit']}"
+        print(line)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark EasyApplyBot against a local mock of LinkedIn")
+    parser.add_argument("--jobs", type=int, default=60, help="postings the mock search returns")
+    parser.add_argument("--delay-ms", type=int, default=150, help="delay of each Easy Apply modal step")
+    parser.add_argument("--search-time", type=int, default=120, help="MAX_SEARCH_TIME per combo, in seconds")
+    parser.add_argument("--positions", nargs="+", default=["python developer"])
+    parser.add_argument("--locations", nargs="+", default=["Remote"])
+    parser.add_argument("--results", type=Path, default=Path(__file__).resolve().parent / "results.jsonl")
+    parser.add_argument("--headed", action="store_true", help="show the browser")
+    parser.add_argument("--lean", action="store_true", help="run the bot in lean mode, see browser_options")
+    args = parser.parse_args()
+    setupLogger()
+
+    record = run(args)
+    report(record, previous(args.results, record))
+    with open(args.results, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+
+log = logging.getLogger(__name__)
+
+
+class Checkpoint:
+    # Crawl state of a run kept on disk so a crashed run can pick up where it
+    # stopped: the combo schedule, the search in progress with its page
+    # offset, and the jobs found on that page with their status. `state` is
+    # updated in place by the bot; save() writes it at most every `interval`
+    # seconds unless forced.
+
+    def __init__(self, path, interval: float = 5.0) -> None:
+        self.path = Path(path)
+        self.interval = interval
+        self.state: dict = {}
+        self.saved: float = 0.0
+
+    def load(self) -> dict | None:
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            log.error("Could not read checkpoint %s: %s", self.path, e)
+            return None
+
+    def save(self, force: bool = False) -> None:
+        if not self.state or (not force and time.time() - self.saved < self.interval):
+            return
+        # write aside and rename so a crash never leaves half a checkpoint
+        temporary: str = f"{self.path}.tmp"
+        try:
+            with open(temporary, 'w', encoding='utf-8') as f:
+                json.dump(self.state, f)
+            os.replace(temporary, self.path)
+            self.saved = time.time()
+        except (OSError, TypeError) as e:
+            log.error("Could not write checkpoint %s: %s", self.path, e)
+
+    def clear(self) -> None:
+        # the run finished, there is nothing left to resume
+        self.state = {}
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
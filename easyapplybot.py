@@ -2,61 +2,263 @@ from __future__ import annotations
 
 import json
 import csv
+import multiprocessing
+import queue
 import logging
-import traceback
 import os
 import random
 import re
 import time
-from datetime import datetime, timedelta
-import getpass
+from datetime import datetime
+import argparse
 from pathlib import Path
 
-import pandas as pd
-import pyautogui
 import yaml
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.support.ui import Select
 from selenium.common.exceptions import TimeoutException
-from selenium.common.exceptions import StaleElementReferenceException
 from selenium.common.exceptions import NoSuchElementException
+from selenium.common.exceptions import InvalidSessionIdException
+from selenium.common.exceptions import NoSuchWindowException
+from selenium.common.exceptions import WebDriverException
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.remote.webelement import WebElement
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 
-from selenium.webdriver.chrome.service import Service as ChromeService
-import webdriver_manager.chrome as ChromeDriverManager
-ChromeDriverManager = ChromeDriverManager.ChromeDriverManager
+from answers import FALLBACK_ANSWER, AnswerIndex, AnswerRules, AnswerStore, question_key
+from backend import SeleniumBrowser
+from checkpoint import Checkpoint
+import eventlog
+from filters import JobFilter
+from instrumentation import Instrumentation, phase
+from jobstore import AppliedJobStore, JobQueue
+from scheduler import ComboScheduler
+from waits import PageWaiter
+from writers import BufferedCSVWriter
 
 
 log = logging.getLogger(__name__)
 
+# Reads every job card on a search results page in one round trip
+JOB_CARDS_SCRIPT = """
+var text = function (card, selector) {
+    var element = card.querySelector(selector);
+    return element ? element.innerText.trim() : "";
+};
+return Array.from(document.querySelectorAll('div[data-job-id]')).map(function (card) {
+    var states = Array.from(card.querySelectorAll('li.job-card-container__footer-job-state'));
+    return {
+        jobID: card.getAttribute('data-job-id'),
+        title: text(card, '.job-card-list__title, .job-card-container__link strong, a.job-card-container__link'),
+        company: text(card, '.job-card-container__primary-description, .artdeco-entity-lockup__subtitle'),
+        location: text(card, '.job-card-container__metadata-item, .artdeco-entity-lockup__caption'),
+        applied: states.some(function (state) { return state.innerText.trim() === 'Applied'; }),
+        promoted: /\bPromoted\b/.test(card.innerText),
+        dismiss: card.querySelector("button[aria-label^='Dismiss']")
+    };
+});
+"""
+
+# Requests a lean browser never sends: images, media, fonts and third party analytics.
+# None of them are needed to find jobs or to fill in the Easy Apply modal.
+LEAN_BLOCKED_URLS = (
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.mp4", "*.webm", "*.m3u8", "*.mp3",
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    "*media.licdn.com/dms/image*", "*media.licdn.com/playlist*",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*px.ads.linkedin.com*",
+    "*linkedin.com/li/track*", "*linkedin.com/realtime*", "*connect.facebook.net*", "*bat.bing.com*",
+)
+
+# Scrolls the results list one screen at a time until the number of rendered
+# cards stops growing for `idle` ms at the bottom of the list, or the deadline passes.
+RESULTS_SCROLL_SCRIPT = """
+var list = arguments[0], idle = arguments[1], deadline = Date.now() + arguments[2];
+var done = arguments[arguments.length - 1];
+var rendered = function () {
+    return Array.from(document.querySelectorAll('div[data-job-id]')).filter(function (card) {
+        return card.innerText.trim() !== '';
+    }).length;
+};
+var start = Date.now(), last = rendered(), changed = start, scrolls = 0;
+var step = function () {
+    list.scrollTop += Math.max(list.clientHeight, 100);
+    scrolls++;
+    var count = rendered(), now = Date.now();
+    if (count !== last) { last = count; changed = now; }
+    var bottom = list.scrollTop + list.clientHeight >= list.scrollHeight - 2;
+    if ((bottom && now - changed >= idle) || now >= deadline) {
+        done({cards: count, scrolls: scrolls, ms: now - start});
+    } else {
+        setTimeout(step, 100);
+    }
+};
+step();
+"""
+
+# Describes every question of the current Easy Apply step: text, control type,
+# options and current value. Control lookup order matches FILL_FORM_SCRIPT.
+FORM_SCHEMA_SCRIPT = """
+var root = document.querySelector('.jobs-easy-apply-modal') || document;
+return Array.from(root.querySelectorAll('.jobs-easy-apply-form-section__grouping')).map(function (field, index) {
+    var choices = Array.from(field.querySelectorAll('input[type=radio], input[type=checkbox]'));
+    var select = field.querySelector('select');
+    var text = field.querySelector('input[type=text], input:not([type])');
+    var textarea = field.querySelector('textarea');
+    var label = function (input) {
+        var element = input.id && field.querySelector('label[for="' + CSS.escape(input.id) + '"]');
+        return (element ? element.innerText : input.value || '').trim();
+    };
+    var schema = {index: index, question: field.innerText.trim(), type: 'unknown', options: [], value: null};
+    if (choices.length) {
+        schema.type = choices[0].type;
+        schema.options = choices.map(function (c) { return {value: c.value, label: label(c), checked: c.checked}; });
+    } else if (select) {
+        schema.type = 'select';
+        schema.options = Array.from(select.options).map(function (o) { return {value: o.value, label: o.text.trim()}; });
+        schema.value = select.value;
+    } else if (text) {
+        schema.type = 'text';
+        schema.value = text.value;
+    } else if (textarea) {
+        schema.type = 'textarea';
+        schema.value = textarea.value;
+    }
+    return schema;
+});
+"""
+
+# Applies every planned answer in one call, firing the events the form listens to
+FILL_FORM_SCRIPT = """
+var root = document.querySelector('.jobs-easy-apply-modal') || document;
+var fields = root.querySelectorAll('.jobs-easy-apply-form-section__grouping');
+var fire = function (element, type) { element.dispatchEvent(new Event(type, {bubbles: true})); };
+var filled = 0;
+arguments[0].forEach(function (action) {
+    var field = fields[action.index];
+    if (!field) { return; }
+    if (action.type === 'text' || action.type === 'textarea') {
+        var input = action.type === 'text' ? field.querySelector('input[type=text], input:not([type])') : field.querySelector('textarea');
+        // use the native setter so framework-controlled inputs see the change
+        Object.getOwnPropertyDescriptor(Object.getPrototypeOf(input), 'value').set.call(input, action.value);
+        fire(input, 'input');
+        fire(input, 'change');
+    } else if (action.type === 'select') {
+        var select = field.querySelector('select');
+        select.selectedIndex = action.option;
+        fire(select, 'change');
+    } else {
+        var choice = field.querySelectorAll('input[type=radio], input[type=checkbox]')[action.option];
+        if (!choice.checked) { choice.click(); }
+    }
+    filled++;
+});
+return filled;
+"""
+
+
+def session_lost(error) -> bool:
+    # True when the browser session is gone. Other driver errors, such as an
+    # intercepted click or a stale element, only spoil the page at hand.
+    if isinstance(error, (InvalidSessionIdException, NoSuchWindowException)):
+        return True
+    message: str = str(error).lower()
+    return isinstance(error, WebDriverException) and ("chrome not reachable" in message or "disconnected" in message)
+
+
+class LazyPage:
+    # Handle on a loaded page. The DOM is only serialized when html is first
+    # read and only parsed when soup is first read, then both are kept for
+    # the rest of this navigation.
+
+    def __init__(self, browser, url, navigation) -> None:
+        self.browser = browser
+        self.url = url
+        self.navigation = navigation
+        self._html = None
+        self._soup = None
+
+    @property
+    def html(self) -> str:
+        if self._html is None:
+            self._html = self.browser.page_source
+        return self._html
+
+    @property
+    def soup(self):
+        if self._soup is None:
+            from bs4 import BeautifulSoup
+            self._soup = BeautifulSoup(self.html, "lxml")
+        return self._soup
+
+
+class SearchCursor:
+    # Where we are in a search's result pages. start= advances by the number
+    # of cards the page really showed, and the search ends on an empty page,
+    # LinkedIn's "no results" banner, or a page of job IDs we already saw.
+
+    def __init__(self) -> None:
+        self.start: int = 0
+        self.pages: int = 0
+        self.seen: set = set()
+        self.finished: bool = False
+        self.reason: str = ""
+        self.totals: dict = {"cards": 0, "new": 0, "submitted": 0}
+
+    def advance(self, jobIDs, no_results=False, new=0, submitted=0) -> bool:
+        page = frozenset(jobIDs)
+        self.pages += 1
+        self.totals["cards"] += len(page)
+        self.totals["new"] += new
+        self.totals["submitted"] += submitted
+        log.info("Results page %d (start=%d): %d cards, %d new, %d applied",
+                 self.pages, self.start, len(page), new, submitted)
+
+        if no_results or not page:
+            self.finished, self.reason = True, "no more results"
+        elif page in self.seen:
+            self.finished, self.reason = True, "results page repeated"
+        else:
+            self.seen.add(page)
+            self.start += len(page)
+        return not self.finished
 
-def setupLogger() -> None:
-    dt: str = datetime.strftime(datetime.now(), "%m_%d_%y %H_%M_%S ")
+    def state(self) -> dict:
+        return {"start": self.start, "pages": self.pages, "totals": self.totals,
+                "seen": [sorted(page) for page in self.seen]}
+
+    @classmethod
+    def from_state(cls, state: dict) -> SearchCursor:
+        cursor = cls()
+        cursor.start = state.get("start", 0)
+        cursor.pages = state.get("pages", 0)
+        cursor.totals.update(state.get("totals", {}))
+        cursor.seen = {frozenset(page) for page in state.get("seen", [])}
+        return cursor
 
-    if not os.path.isdir('./logs'):
-        os.mkdir('./logs')
+    def summary(self) -> str:
+        return (f"{self.pages} pages, {self.totals['cards']} cards, {self.totals['new']} new jobs, "
+                f"{self.totals['submitted']} applications")
 
-    # TODO need to check if there is a log dir available or not
-    logging.basicConfig(filename=('./logs/' + str(dt) + 'applyJobs.log'), filemode='w',
-                        format='%(asctime)s::%(name)s::%(levelname)s::%(message)s', datefmt='./logs/%d-%b-%y %H:%M:%S')
+
+def setupLogger() -> None:
+    # call once from the entry point, importing this module must not touch the disk
+    dt: str = datetime.strftime(datetime.now(), "%m_%d_%y %H_%M_%S ")
+    os.makedirs('./logs', exist_ok=True)
+    # worker processes keep their own log files
+    process: str = multiprocessing.current_process().name
+    suffix: str = "" if process == "MainProcess" else process + " "
+    eventlog.start('./logs/' + dt + suffix + 'applyJobs.jsonl')
     log.setLevel(logging.DEBUG)
-    c_handler = logging.StreamHandler()
-    c_handler.setLevel(logging.DEBUG)
-    c_format = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s', '%H:%M:%S')
-    c_handler.setFormatter(c_format)
-    log.addHandler(c_handler)
 
 
 class EasyApplyBot:
-    setupLogger()
     # MAX_SEARCH_TIME is 10 hours by default, feel free to modify it
     MAX_SEARCH_TIME = 60 * 20
+    # a search that turns up no new jobs for this long is given up early
+    DRY_SEARCH_TIME = 60 * 3
+    # point this at a local stand-in to benchmark without touching the real site
+    BASE_URL = "https://www.linkedin.com"
 
     def __init__(self,
                  username,
@@ -69,12 +271,18 @@ class EasyApplyBot:
                  filename='output.csv',
                  blacklist=[],
                  blackListTitles=[],
-                 experience_level=[]
+                 experience_level=[],
+                 browser=None,
+                 profile_path=None,
+                 driver_path=None,
+                 session_file='linkedin_session.json',
+                 blackListLocations=[],
+                 lean=False
                  ) -> None:
 
         log.info("Welcome to Easy Apply Bot")
         dirpath: str = os.getcwd()
-        log.info("current directory is : " + dirpath)
+        log.info("current directory is : %s", dirpath)
         log.info("Please wait while we prepare the bot for you")
 
         if experience_level:
@@ -88,7 +296,7 @@ class EasyApplyBot:
             }
 
             applied_levels = [experience_levels[level] for level in experience_level]
-            log.info("Applying for experience level roles: " + ", ".join(applied_levels))
+            log.info("Applying for experience level roles: %s", ", ".join(applied_levels))
         else:
             log.info("Applying for all experience levels")
         
@@ -96,15 +304,34 @@ class EasyApplyBot:
         self.uploads = uploads
         self.salary = salary
         self.rate = rate
-        past_ids: list | None = self.get_appliedIDs(filename)
-        self.appliedJobIDs: list = past_ids if past_ids != None else []
+        self.appliedJobIDs: AppliedJobStore = AppliedJobStore(filename)
+        # jobs whose application raised, not retried this run but left for later ones
+        self.failed_jobs: set = set()
         self.filename: str = filename
-        self.options = self.browser_options()
-        self.browser = webdriver.Chrome(service=ChromeService(ChromeDriverManager().install()), options=self.options)
+        self.results_log = BufferedCSVWriter(filename)
+        self.session_file = Path(session_file)
+        self.lean = lean
+        self.options = self.browser_options(profile_path, lean)
+        # any backend.Browser works, e.g. a FakeBrowser serving HTML fixtures
+        self.browser = browser if browser is not None else SeleniumBrowser(self.options, driver_path)
+        if lean:
+            self.browser.block_urls(LEAN_BLOCKED_URLS)
+        # worker processes keep their own metrics files
+        suffix: str = "" if multiprocessing.current_process().name == "MainProcess" else "-" + multiprocessing.current_process().name
+        self.metrics = Instrumentation(f"./logs/metrics{suffix}.jsonl", f"./logs/metrics{suffix}.prom")
+        self.metrics.attach(self.browser)
         self.wait = WebDriverWait(self.browser, 30)
+        self.waiter = PageWaiter(self.browser)
+        self.navigation = 0
+        self.page = None
+        # crawl state of start_apply, see Checkpoint
+        self.checkpoint = Checkpoint(Path(filename).with_suffix(".checkpoint.json"))
         self.blacklist = blacklist
         self.blackListTitles = blackListTitles
-        self.start_linkedin(username, password)
+        # checked against the search result cards, before any job page is opened
+        self.job_filter = JobFilter(blacklist, blackListTitles, blackListLocations)
+        if username is not None:
+            self.start_linkedin(username, password)
         self.phone_number = phone_number
         self.experience_level = experience_level
 
@@ -132,45 +359,56 @@ class EasyApplyBot:
             "easy_apply_button": (By.XPATH, '//button[contains(@class, "jobs-apply-button")]'),
             "date_posted_button": (By.XPATH, '//button[contains(@id, "searchFilter_timePostedRange")]'),
             "date_posted_expanded": (By.XPATH, '//button[contains(@id, "searchFilter_timePostedRange")]'),
+            "modal": (By.CLASS_NAME, "jobs-easy-apply-modal"),
+            "no_results": (By.CLASS_NAME, "jobs-search-no-results-banner"),
 
         }
 
 
+        self.answer_rules = AnswerRules("answers.yaml", {"salary": salary, "rate": rate})
+
         #initialize questions and answers file
         self.qa_file = Path("qa.csv")
-        self.answers = {}
 
-        #if qa file does not exist, create it
-        if self.qa_file.is_file():
-            df = pd.read_csv(self.qa_file)
-            for index, row in df.iterrows():
-                self.answers[row['Question']] = row['Answer']
+        #use the compacted answers if there are any, see AnswerStore
+        if self.qa_file.with_suffix(".db").is_file():
+            store = AnswerStore(self.qa_file.with_suffix(".db"))
+            self.answers = store.load(self.qa_file)
+            store.close()
         #if qa file does exist, load it
+        elif self.qa_file.is_file():
+            self.answers = AnswerIndex.from_csv(self.qa_file)
+        #if qa file does not exist, create it
         else:
-            df = pd.DataFrame(columns=["Question", "Answer"])
-            df.to_csv(self.qa_file, index=False, encoding='utf-8')
-
-
-    def get_appliedIDs(self, filename) -> list | None:
-        try:
-            df = pd.read_csv(filename,
-                             header=None,
-                             names=['timestamp', 'jobID', 'job', 'company', 'attempted', 'result'],
-                             lineterminator='\n',
-                             encoding='utf-8')
-
-            df['timestamp'] = pd.to_datetime(df['timestamp'], format="%Y-%m-%d %H:%M:%S")
-            df = df[df['timestamp'] > (datetime.now() - timedelta(days=2))]
-            jobIDs: list = list(df.jobID)
-            log.info(f"{len(jobIDs)} jobIDs found")
-            return jobIDs
-        except Exception as e:
-            log.info(str(e) + "   jobIDs could not be loaded from CSV {}".format(filename))
-            return None
-
-    def browser_options(self):
-        options = webdriver.ChromeOptions()
-        options.add_argument("--start-maximized")
+            self.answers = AnswerIndex()
+            with open(self.qa_file, 'w', newline='', encoding='utf-8') as f:
+                csv.writer(f).writerow(["Question", "Answer"])
+        self.qa_log = BufferedCSVWriter(self.qa_file)
+        placeholders: int = sum(1 for answer in self.answers.answers.values() if answer == FALLBACK_ANSWER)
+        if placeholders:
+            log.info("%d learned answers are %r, which older versions also saved for unknown questions. "
+                     "Check them in %s, or clear them all with: python3 answers.py forget",
+                     placeholders, FALLBACK_ANSWER, self.qa_file)
+        # questions like ones answered before get the same answer; numpy is
+        # only loaded here, importing the bot module stays cheap
+        from similarity import SimilarityIndex
+        self.similar = SimilarityIndex.load_or_build(self.qa_file.with_suffix(".index"), self.answers.answers)
+
+
+    @staticmethod
+    def browser_options(profile_path=None, lean=False):
+        options = Options()
+        if lean:
+            # headless with a fixed viewport, the page is usable once the DOM is parsed
+            options.add_argument("--headless=new")
+            options.add_argument("--window-size=1366,900")
+            options.page_load_strategy = "eager"
+            options.add_argument("--blink-settings=imagesEnabled=false")
+            options.add_argument("--mute-audio")
+            options.add_argument("--disk-cache-size=33554432")  # 32 MB
+            options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+        else:
+            options.add_argument("--start-maximized")
         options.add_argument("--ignore-certificate-errors")
         options.add_argument('--no-sandbox')
         options.add_argument("--disable-extensions")
@@ -181,18 +419,52 @@ class EasyApplyBot:
         options.add_argument("--disable-blink-features")
         options.add_argument("--disable-blink-features=AutomationControlled")
 
-        # Load user profile
-        #options.add_argument(r"--user-data-dir={}".format(self.profile_path))
+        # Load user profile, Chrome then keeps the LinkedIn session itself
+        if profile_path:
+            options.add_argument(r"--user-data-dir={}".format(profile_path))
         return options
 
+    def is_logged_in(self) -> bool:
+        self.navigate(self.BASE_URL + "/feed/")
+        self.waiter.ready(timeout=10)
+        # signed out visitors are redirected to the login or authwall pages
+        return "/feed" in self.browser.current_url and not self.is_present((By.ID, "username"))
+
+    def restore_session(self) -> bool:
+        if self.session_file.is_file():
+            try:
+                # cookies can only be set for the domain that is open
+                self.navigate(self.BASE_URL + "/")
+                for cookie in json.loads(self.session_file.read_text()):
+                    cookie.pop("sameSite", None)
+                    self.browser.add_cookie(cookie)
+            except Exception as e:
+                log.info("Saved session could not be restored: %s", e)
+        return self.is_logged_in()
+
+    def save_session(self) -> None:
+        try:
+            # the cookies are as good as the password, never readable by others, not even briefly
+            fd = os.open(self.session_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            os.fchmod(fd, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                f.write(json.dumps(self.browser.get_cookies()))
+        except Exception as e:
+            log.info("Session could not be saved: %s", e)
+
+    @phase("login")
     def start_linkedin(self, username, password) -> None:
-        log.info("Logging in.....Please wait :)")
-        self.browser.get("https://www.linkedin.com/login?trk=guest_homepage-basic_nav-header-signin")
+        if self.restore_session():
+            log.info("Reusing the saved LinkedIn session")
+            return
 
-        time.sleep(10)
+        log.info("Logging in.....Please wait :)")
+        self.navigate(self.BASE_URL + "/login?trk=guest_homepage-basic_nav-header-signin")
 
         try:
-            user_field = self.browser.find_element("id", "username")
+            user_field = self.waiter.element((By.ID, "username"), timeout=30)
+            if user_field is None:
+                raise TimeoutException()
             pw_field = self.browser.find_element("id", "password")
             
             # Wait for the login button to be present before interacting with it
@@ -203,63 +475,180 @@ class EasyApplyBot:
             login_button = self.browser.find_element("xpath", "//button[normalize-space(text())='Sign in']")
             
             user_field.send_keys(username)
-            time.sleep(0.5)
             user_field.send_keys(Keys.TAB)
-            time.sleep(5)
             pw_field.send_keys(password)
-            time.sleep(5)
             
             # Click the login button after ensuring it is clickable
             login_button.click()
-            time.sleep(20)
+
+            # Leave time for a manual security check, but continue as soon as the feed shows up
+            if self.waiter.until(lambda d: "/feed" in d.current_url, timeout=120) is None:
+                log.warning("Login did not reach the feed, continuing anyway")
+            else:
+                self.save_session()
+            self.waiter.ready()
 
         except TimeoutException:
             log.info("TimeoutException! Username/password field or login button not found")
         except NoSuchElementException as e:
-            log.error(f"Element not found: {e}")
+            log.error("Element not found: %s", e)
 
     def fill_data(self) -> None:
+        if self.lean:
+            # a headless window keeps its viewport
+            return
         self.browser.set_window_size(1, 1)
         self.browser.set_window_position(2000, 2000)
 
-    def start_apply(self, positions, locations) -> None:
+    def start_apply(self, positions, locations, resume=False) -> None:
         start: float = time.time()
         self.fill_data()
         self.positions = positions
         self.locations = locations
-        combos: list = []
-        while len(combos) < len(positions) * len(locations):
-            position = positions[random.randint(0, len(positions) - 1)]
-            location = locations[random.randint(0, len(locations) - 1)]
-            combo: tuple = (position, location)
-            if combo not in combos:
-                combos.append(combo)
-                log.info(f"Applying to {position}: {location}")
-                location = "&location=" + location
-                self.applications_loop(position, location)
-            if len(combos) > 500:
-                break
+        # same overall time as searching every combo once, spent where applications come from
+        scheduler = ComboScheduler(self.appliedJobIDs.db_path, positions, locations,
+                                   total_time=self.MAX_SEARCH_TIME * len(positions) * len(locations),
+                                   max_budget=self.MAX_SEARCH_TIME)
+        state: dict | None = self.checkpoint.load() if resume else None
+        if resume and not state:
+            log.info("No checkpoint to resume from, starting a new run")
+        elif state and (state.get("positions") != positions or state.get("locations") != locations):
+            log.warning("Positions or locations changed since the checkpoint, starting a new run")
+            state = None
+        if state:
+            scheduler.restore(state["schedule"])
+        self.checkpoint.state = {"positions": positions, "locations": locations, "schedule": scheduler.state()}
+
+        if state and state.get("search"):
+            # finish the search the last run was in the middle of
+            search: dict = state["search"]
+            pending: dict = {}
+            for jobID, card in search.get("jobs", {}).items():
+                if card["status"] in ("To be processed", "Applying"):
+                    self.appliedJobIDs.release(jobID)
+                    card["status"] = "To be processed"
+                    pending[jobID] = card
+            log.info("Resuming %s: %s at result %s with %s jobs left from that page",
+                     search['position'], search['location'], search['cursor']['start'], len(pending))
+            self.search(scheduler, search["position"], search["location"], search["budget"],
+                        SearchCursor.from_state(search["cursor"]), pending)
+
+        for position, location, budget in scheduler:
+            self.search(scheduler, position, location, budget)
+
+        self.checkpoint.clear()
+        self.results_log.flush()
+        self.qa_log.flush()
+        self.similar.save()
+        log.info("Learned answers: %s, %s", self.answers.stats(), self.similar.stats())
+
+    def search(self, scheduler, position, location, budget, cursor=None, pending=None) -> None:
+        log.info("Applying to %s: %s for up to %.0f minutes", position, location, budget / 60)
+        self.checkpoint.state["schedule"] = scheduler.state()
+        self.checkpoint.state["search"] = {"position": position, "location": location, "budget": budget}
+        searched: float = time.time()
+        new_jobs, submitted = self.applications_loop(position, "&location=" + location, budget=budget,
+                                                     cursor=cursor, pending=pending)
+        scheduler.record(position, location, time.time() - searched, new_jobs, submitted)
+        self.checkpoint.state["schedule"] = scheduler.state()
+        self.checkpoint.state["search"] = None
+        self.checkpoint.save(force=True)
 
     # self.finish_apply() --> this does seem to cause more harm than good, since it closes the browser which we usually don't want, other conditions will stop the loop and just break out
 
-    def applications_loop(self, position, location):
+    def discover(self, positions, locations, jobs, max_pending=200, applying=None) -> None:
+        # fill the job queue without applying, e.g. ahead of an application run;
+        # `applying` is an Event set while an application stage drains the queue
+        self.fill_data()
+        pairs: list = [(position, location) for position in positions for location in locations]
+        random.shuffle(pairs)
+        for position, location in pairs:
+            log.info("Discovering %s: %s", position, location)
+            self.applications_loop(position, "&location=" + location,
+                                   handle=lambda jobIDs: self.enqueue_jobs(jobs, jobIDs, position, location,
+                                                                           max_pending, applying))
+
+    def enqueue_jobs(self, jobs, jobIDs, position, location, max_pending, applying=None) -> None:
+        # backpressure: let the application stage catch up first
+        while jobs.pending() >= max_pending:
+            if applying is not None and not applying.is_set():
+                # nobody left to catch up, the queue keeps them for --mode apply
+                log.warning("No application worker left, queueing without waiting")
+                break
+            log.info("%s jobs waiting to be applied to, pausing discovery", max_pending)
+            time.sleep(5)
+        added = jobs.push(jobIDs.values(), position, location)
+        log.info("Queued %s new jobs, %s waiting", added, jobs.pending())
+
+    def drain_queue(self, jobs, discovering=None) -> None:
+        # apply to queued jobs until the queue is empty and discovery is done
+        while True:
+            record = jobs.pop()
+            if record is None:
+                if discovering is not None and discovering.is_set():
+                    time.sleep(2)
+                    continue
+                break
+            jobID = record["jobID"]
+            if not self.appliedJobIDs.claim(jobID):
+                jobs.done(jobID, "skipped")
+                continue
+            try:
+                applied = self.apply_to_job(jobID)
+            except Exception as e:
+                if session_lost(e):
+                    # left taken and claimed, requeue_taken gives it back on the next start
+                    raise
+                log.error("Could not apply to %s: %s", jobID, e)
+                self.appliedJobIDs.release(jobID)
+                jobs.done(jobID, "failed")
+                continue
+            log.info("%s to %s: %s at %s", 'Applied' if applied else 'Failed to apply', jobID,
+                     record['title'], record['company'])
+            jobs.done(jobID, applied)
+        self.results_log.flush()
+        self.qa_log.flush()
+        self.similar.save()
+
+    def applications_loop(self, position, location, handle=None, budget=None, cursor=None, pending=None):
+        # found jobs are applied to right away unless another handler is given
+        handle = handle or self.apply_loop
+        budget = budget or self.MAX_SEARCH_TIME
 
         count_application = 0
         count_job = 0
-        jobs_per_page = 0
+        cursor = cursor or SearchCursor()
         start_time: float = time.time()
+        last_found: float = start_time
 
         log.info("Looking for jobs.. Please wait..")
 
-        self.browser.set_window_position(1, 1)
-        self.browser.maximize_window()
-        self.browser, _ = self.next_jobs_page(position, location, jobs_per_page, experience_level=self.experience_level)
-        log.info("Set and maximize window")
-
-        while time.time() - start_time < self.MAX_SEARCH_TIME:
+        if not self.lean:
+            self.browser.set_window_position(1, 1)
+            self.browser.maximize_window()
+            log.info("Set and maximize window")
+        if pending:
+            # jobs found by a run that stopped before getting to them
+            self.checkpoint_search(cursor, pending, budget)
+            count_job += len(pending)
+            handle(pending)
+            count_application += sum(1 for card in pending.values() if card["status"] is True)
+        self.browser, _ = self.next_jobs_page(position, location, cursor.start, experience_level=self.experience_level)
+        reload: bool = False
+
+        while time.time() - start_time < budget:
+            if time.time() - last_found > self.DRY_SEARCH_TIME:
+                log.info("No new jobs for %s minutes, ending this search", self.DRY_SEARCH_TIME // 60)
+                break
             # time.sleep(8)
             try:
-                log.info(f"{(self.MAX_SEARCH_TIME - (time.time() - start_time)) // 60} minutes left in this search")
+                log.info("%d minutes left in this search", (budget - (time.time() - start_time)) // 60)
+                if reload:
+                    # a failed pass may have left the browser on a job page, whose
+                    # missing cards would read as the end of the results
+                    self.browser, _ = self.next_jobs_page(position, location, cursor.start,
+                                                          experience_level=self.experience_level)
+                    reload = False
 
                 # # Check for human verification
                 # if self.is_present(self.locator["human_verification"]):  # Make sure to define this locator
@@ -268,84 +657,116 @@ class EasyApplyBot:
                 #         time.sleep(10)  # Pause and wait until the user completes verification
 
                 randoTime: float = random.uniform(1.5, 2.9)
-                log.debug(f"Sleeping for {round(randoTime, 1)}")
-                self.load_page(sleep=0.5)
+                log.debug("Sleeping for %.1f", randoTime)
+                with self.metrics.phase("search_page"):
+                    self.load_page(quiet=0.5)
 
                 if self.is_present(self.locator["search"]):
-                    
-                    scrollresults = self.get_elements("search")
-
-                    for i in range(300, 5000, 100):
-                        self.browser.execute_script("arguments[0].scrollTo(0, {})".format(i), scrollresults[0])
-                        time.sleep(0.5)  # Wait for new elements to load
+                    self.scroll_results(self.get_elements("search")[0])
+
+                cards = self.get_job_cards()
+                no_results: bool = self.is_present(self.locator["no_results"])
+                jobIDs = {}
+                submitted = 0
+                if len(cards) > 0 and not no_results:
+
+                    for card in cards:
+                        jobID = card["jobID"]
+
+                        # Get rid of jobs that have been already applied
+                        if card["applied"]:
+                            log.debug("Job already applied: %s at %s", card['title'], card['company'])
+                            if card["dismiss"] is not None:
+                                card["dismiss"].click()
+                            continue  # Skip this job card if it's already applied
+
+                        reason = self.job_filter.reason(card)
+                        if reason:
+                            log.info("Skipping %s: %s at %s, %s", jobID, card['title'], card['company'], reason)
+                            continue
+                        if not jobID or jobID == "search":
+                            log.debug("Job ID not found, search keyword found instead? %s", card['title'])
+                        elif jobID in self.appliedJobIDs or jobID in self.failed_jobs:
+                            log.debug("Job %s already handled, skipping", jobID)
+                        elif jobID not in jobIDs:
+                            card["status"] = "To be processed"
+                            card.pop("dismiss", None)
+                            jobIDs[jobID] = card
 
-                if self.is_present(self.locator["links"]):
-                    links = self.get_elements("links")
-                    
-                    jobIDs = {}
-
-                    for link in links:
-
-                        try:
-                            # Look for the "Applied" status within the footer section of the job card
-                            applied_status = link.find_element(By.XPATH, ".//div/ul/li[contains(@class, 'job-card-container__footer-job-state') and normalize-space(.)='Applied']")
-
-                            # Get rid of jobs that have been already applied
-                            if applied_status.is_displayed():
-                                log.debug("Job already applied: {}".format(link.text))
-                                dismissBtn = link.find_element(By.XPATH, ".//button[starts-with(@aria-label, 'Dismiss')]")
-                                dismissBtn.click()
-                                continue  # Skip this job card if it's already applied
-
-                        except NoSuchElementException:
-                            if link.text not in self.blacklist:
-                                jobID = link.get_attribute("data-job-id")
-                                if jobID == "search":
-                                    log.debug("Job ID not found, search keyword found instead? {}".format(link.text))
-                                    continue
-                                else:
-                                    # If "Applied" status somehow passes, check if `JobID` is already in dict
-                                    # Ensure that don't get 
-                                    if jobID not in jobIDs:
-                                        jobIDs[jobID] = "To be processed"
-                    
                     if len(jobIDs) > 0:
-                        self.apply_loop(jobIDs)
-
-                    self.browser, jobs_per_page = self.next_jobs_page(position, location, jobs_per_page, experience_level=self.experience_level)
-
-                else:
-                    self.browser, jobs_per_page = self.next_jobs_page(position, location, jobs_per_page, experience_level=self.experience_level)
+                        last_found = time.time()
+                        count_job += len(jobIDs)
+                        self.checkpoint_search(cursor, jobIDs, budget - (time.time() - start_time))
+                        handle(jobIDs)
+                        submitted = sum(1 for card in jobIDs.values() if card["status"] is True)
+                        count_application += submitted
+
+                if not cursor.advance([card["jobID"] for card in cards], no_results, len(jobIDs), submitted):
+                    log.info("End of the search: %s", cursor.reason)
+                    break
+                self.checkpoint_search(cursor, {}, budget - (time.time() - start_time))
+                self.browser, _ = self.next_jobs_page(position, location, cursor.start, experience_level=self.experience_level)
 
             except Exception as e:
-                print(e)
-             
+                if session_lost(e):
+                    # the browser itself is gone, stop with the search still in the checkpoint
+                    raise
+                log.error("Results page failed: %s", e)
+                reload = True
+
+        log.info("Search %s %s: %s", position, location, cursor.summary())
+        return count_job, count_application
+
+    def checkpoint_search(self, cursor, jobIDs, budget) -> None:
+        # only start_apply keeps a checkpoint of the search it is in
+        search: dict | None = self.checkpoint.state.get("search")
+        if search is not None:
+            search.update(cursor=cursor.state(), jobs=jobIDs, budget=budget)
+            self.checkpoint.save(force=True)
+
     def apply_loop(self, jobIDs):
-        for jobID in jobIDs:
-            if jobIDs[jobID] == "To be processed":
-                applied = self.apply_to_job(jobID)
+        for jobID, card in jobIDs.items():
+            if card["status"] == "To be processed" and not self.appliedJobIDs.claim(jobID):
+                # already handled here or claimed by another worker
+                card["status"] = False
+            elif card["status"] == "To be processed":
+                card["status"] = "Applying"
+                self.checkpoint.save()
+                try:
+                    applied = self.apply_to_job(jobID)
+                except Exception:
+                    # a claim that outlives the run would skip the job for good
+                    self.appliedJobIDs.release(jobID)
+                    self.failed_jobs.add(jobID)
+                    card["status"] = False
+                    raise
                 if applied:
-                    log.info(f"Applied to {jobID}")
+                    log.info("Applied to %s: %s at %s", jobID, card['title'], card['company'])
                 else:
-                    log.info(f"Failed to apply to {jobID}")
-                jobIDs[jobID] = applied
+                    log.info("Failed to apply to %s", jobID)
+                card["status"] = applied
+                self.checkpoint.save()
 
     def apply_to_job(self, jobID):
         # #self.avoid_lock() # annoying
+        self.metrics.start_application(jobID)
 
         # get job page
         self.get_job_page(jobID)
 
-        # let page load
-        time.sleep(1)
+        # let the top card render its apply button
+        with self.metrics.phase("job_page"):
+            self.waiter.element(self.locator["easy_apply_button"], timeout=3)
 
-        # get easy apply button
-        button = self.get_easy_apply_button()
+            # get easy apply button
+            button = self.get_easy_apply_button()
     
         # word filter to skip positions not wanted
         if button is not False:
-            if any(word in self.browser.title for word in blackListTitles):
-                log.info('skipping this application, a blacklisted keyword was found in the job position')
+            # cards are filtered before navigation, this catches jobs queued or carded without a title
+            reason = self.job_filter.reason({"title": self.browser.title})
+            if reason:
+                log.info("Skipping this application, %s", reason)
                 string_easy = "* Contains blacklisted keyword"
                 result = False
             else:
@@ -354,15 +775,17 @@ class EasyApplyBot:
                 button.click()
 
                 clicked = True
-                time.sleep(1)
-                self.fill_out_fields()
+                # send_resume times the steps after the first on its own
+                with self.metrics.phase("modal_step"):
+                    self.waiter.element(self.locator["modal"], timeout=10)
+                    self.fill_out_fields()
                 result: bool = self.send_resume()
                 if result:
                     string_easy = "*Applied: Sent Resume"
                 else:
                     string_easy = "*Did not apply: Failed to send Resume"
 
-        elif "You applied on" in self.browser.page_source:
+        elif "You applied on" in self.job_page.html:
             log.info("You have already applied to this position.")
             string_easy = "* Already Applied"
             result = False
@@ -373,12 +796,13 @@ class EasyApplyBot:
 
 
         # position_number: str = str(count_job + jobs_per_page)
-        log.info(f"\nPosition {jobID}:\n {self.browser.title} \n {string_easy} \n")
+        log.info("\nPosition %s:\n %s \n %s \n", jobID, self.browser.title, string_easy)
 
-        self.write_to_file(button, jobID, self.browser.title, result)
+        self.write_to_file(button, jobID, self.browser.title, result, string_easy)
+        self.metrics.finish_application(result)
         return result
 
-    def write_to_file(self, button, jobID, browserTitle, result) -> None:
+    def write_to_file(self, button, jobID, browserTitle, result, reason="") -> None:
         def re_extract(text, pattern):
             target = re.search(pattern, text)
             if target:
@@ -390,16 +814,17 @@ class EasyApplyBot:
         job = re_extract(browserTitle.split(' | ')[0], r"\(?\d?\)?\s?(\w.*)")
         company = re_extract(browserTitle.split(' | ')[1], r"(\w.*)")
 
-        toWrite: list = [timestamp, jobID, job, company, attempted, result]
-        with open(self.filename, 'a+') as f:
-            writer = csv.writer(f)
-            writer.writerow(toWrite)
+        # the reason column came later, older rows only have the first six
+        toWrite: list = [timestamp, jobID, job, company, attempted, result, reason.strip("* ")]
+        self.results_log.write(toWrite)
+        self.appliedJobIDs.add(jobID, timestamp, job, company, attempted, result)
 
+    @phase("job_page")
     def get_job_page(self, jobID):
 
-        job: str = 'https://www.linkedin.com/jobs/view/' + str(jobID)
-        self.browser.get(job)
-        self.job_page = self.load_page(sleep=0.5)
+        job: str = self.BASE_URL + '/jobs/view/' + str(jobID)
+        self.navigate(job)
+        self.job_page = self.load_page(quiet=0.5)
         return self.job_page
 
     def get_easy_apply_button(self):
@@ -415,8 +840,7 @@ class EasyApplyBot:
                     log.debug("Easy Apply button not found")
             
         except Exception as e: 
-            print("Exception:",e)
-            log.debug("Easy Apply button not found")
+            log.debug("Easy Apply button not found: %s", e)
 
         return EasyApplyButton
         
@@ -433,8 +857,7 @@ class EasyApplyBot:
                     log.debug("Easy Apply button not found")
             
         except Exception as e: 
-            print("Exception:",e)
-            log.debug("Easy Apply button not found")
+            log.debug("Easy Apply button not found: %s", e)
 
         return EasyApplyButton
 
@@ -450,6 +873,28 @@ class EasyApplyBot:
         return
 
 
+    @phase("search_page")
+    def scroll_results(self, results, idle=0.6, timeout=10) -> int:
+        # scroll only as long as new cards keep rendering
+        try:
+            scrolled = self.browser.execute_async_script(RESULTS_SCROLL_SCRIPT, results,
+                                                         int(idle * 1000), int(timeout * 1000))
+        except Exception as e:
+            log.error("Could not scroll the results list: %s", e)
+            return 0
+        log.info("Materialized %s job cards in %s scrolls, %.1fs",
+                 scrolled['cards'], scrolled['scrolls'], scrolled['ms'] / 1000)
+        return scrolled['cards']
+
+    @phase("card_extraction")
+    def get_job_cards(self) -> list:
+        # jobID, title, company, location, applied, promoted and the dismiss button of every card
+        try:
+            return self.browser.execute_script(JOB_CARDS_SCRIPT) or []
+        except Exception as e:
+            log.error("Could not read the job cards: %s", e)
+            return []
+
     def get_elements(self, type) -> list:
         elements = []
         element = self.locator[type]
@@ -461,22 +906,7 @@ class EasyApplyBot:
         return len(self.browser.find_elements(locator[0],
                                               locator[1])) > 0
 
-    def is_found_field(self, locator, field):
-        try:
-            return len(field.find_elements(locator[0], locator[1])) > 0
-        except Exception as e:
-            print(f"Error occurred while finding elements: {e}")
-            return False
-
-    def get_child_elements(self, locator, field):
-        try:
-            return field.find_elements(locator[0], locator[1])
-        except Exception as e:
-            print(f"Error occurred while finding elements: {e}")
-            return []  # Return an empty list instead of False
-
-
-
+    @phase("modal_step")
     def send_resume(self) -> bool:
         def is_present(button_locator) -> bool:
             return len(self.browser.find_elements(button_locator[0],
@@ -498,10 +928,13 @@ class EasyApplyBot:
 
             submitted = False
             loop = 0
+            attempts = 0
 
-            while loop < 2:
-                print("Entered")
-                time.sleep(2)
+            # a modal has a handful of steps, don't spin forever on one we can't pass
+            while loop < 12:
+                loop += 1
+                log.debug("Easy Apply step %d", loop)
+                self.waiter.dom_idle(quiet=0.3, timeout=5)
                 # Upload resume
                 if is_present(upload_resume_locator):
                     #upload_locator = self.browser.find_element(By.NAME, "file")
@@ -512,8 +945,8 @@ class EasyApplyBot:
                     except Exception as e:
                         log.error(e)
                         log.error("Resume upload failed")
-                        log.debug("Resume: " + resume)
-                        log.debug("Resume Locator: " + str(resume_locator))
+                        log.debug("Resume: %s", resume)
+                        log.debug("Resume Locator: %s", resume_locator)
                 # Upload cover letter if possible
                 if is_present(upload_cv_locator):
                     cv = self.uploads["Cover Letter"]
@@ -530,35 +963,39 @@ class EasyApplyBot:
                 if len(self.get_elements("submit")) > 0:
                     elements = self.get_elements("submit")
                     for element in elements:
-                        button = self.wait.until(EC.element_to_be_clickable(element))
-                        button.click()
+                        with self.metrics.phase("submit"):
+                            button = self.wait.until(EC.element_to_be_clickable(element))
+                            button.click()
                         log.info("Application Submitted")
                         submitted = True
                         break
+                    if submitted:
+                        break
 
-                elif len(self.get_elements("error")) > 0:
+                elif errors := self.get_elements("error"):
 
-                    print("Length", len(self.get_elements("error")))
+                    log.debug("%d fields need an answer", len(errors))
                     
                     if "application was sent" in self.browser.page_source:
                         log.info("Application Submitted")
                         submitted = True
                         break
 
-                    else:
-                        while True:
-                            log.info("Please answer the questions, waiting 5 seconds...")
-                            time.sleep(5)
+                    attempts += 1
+                    if attempts > 3:
+                        log.info("Could not get past the questions, giving up on this application")
+                        break
 
-                            self.process_questions()
+                    log.info("Answering the questions, waiting for the form to settle...")
+                    self.waiter.dom_idle(quiet=0.5, timeout=5)
+                    self.process_questions()
 
-                            if "application was sent" in self.browser.page_source:
-                                log.info("Application Submitted")
-                                submitted = True
-                                break
-                            elif is_present(self.locator["easy_apply_button"]):
-                                submitted = False
-                                break
+                    # the errors only clear once the step is sent again
+                    for name in ("next", "review"):
+                        elements = self.get_elements(name)
+                        if len(elements) > 0:
+                            self.wait.until(EC.element_to_be_clickable(elements[0])).click()
+                            break
 
                 elif len(self.get_elements("next")) > 0:
                     elements = self.get_elements("next")
@@ -570,7 +1007,7 @@ class EasyApplyBot:
                     elements = self.get_elements("continue_applying")
                     for element in elements:
                         button = self.wait.until(EC.element_to_be_clickable(element))
-                        log.info(button.text + "Here!")
+                        log.info("%sHere!", button.text)
                         button.click()
 
                 elif len(self.get_elements("review")) > 0:
@@ -593,376 +1030,133 @@ class EasyApplyBot:
 
         return submitted
 
+    @phase("questions")
     def process_questions(self):
-        time.sleep(3)
-
-        form = self.get_elements("fields")  # Getting form elements
-
-        print("Length: ", len(form))
-
-        for i in range(len(form)):  
-
-            try:
-                # Attempt to re-locate the elements dynamically inside the loop
-                form = self.get_elements("fields")
-                field = form[i]
-                question = field.text.strip()  # Ensure question text is stripped of whitespace
-                
-                # Get answer for each question individually
-                answer = self.ans_question(question.lower())  
-
-            except StaleElementReferenceException:
-                log.warning(f"Element became stale: {field}, re-fetching form elements.")
-                continue
-
-            # Clear existing selections
-            try:
-                # Unselect radio buttons
-                if self.is_found_field(self.locator["radio_select"], field):
-                    # Returns a list of web elements
-                    radio_buttons = self.get_child_elements(self.locator["radio_select"], field)
-
-                    for radio_button in radio_buttons: # `radio_button` is a web element
-                        self.browser.execute_script("""
-                            arguments[0].checked = false;
-                            arguments[0].dispatchEvent(new Event('change'));
-                        """, radio_button)
-                        log.info("Radio button unselected")
-
-                # Unselect multi-select options
-                elif self.is_found_field(self.locator["multi_select"], field):
-                    # Get the first and only select element
-                    select_element = self.get_child_elements(self.locator["multi_select"], field)[0]  # `select_element` is a web element
-
-                    # Reset to the default value
-                    self.browser.execute_script("arguments[0].selectedIndex = 0; arguments[0].dispatchEvent(new Event('change'));", select_element)
-                    log.info("Multi-select reset to default value: 'Select an option'")
-
-
-            except Exception as e:
-                log.error(f"Error clearing existing selections: {e}")
-
-        time.sleep(1)
-
-        for i in range(len(form)):
-            try:
-                # Attempt to re-locate the elements dynamically inside the loop
-                form = self.get_elements("fields")
-                field = form[i]
-                question = field.text.strip()  # Strip whitespace from question
-                
-                log.info(f"Processing question: {question}")
-                answer = self.ans_question(question.lower())  # Get answer based on the current question
-                log.info(f"Answer determined: {answer}")
-
-            except StaleElementReferenceException:
-                log.warning(f"Element became stale: {field}, re-fetching form elements.")
-                continue
-
-            # Scroll the field into view before interacting
-            self.browser.execute_script("arguments[0].scrollIntoView(true);", field)
-
-            # Check if input type is radio button
-            if self.is_found_field(self.locator["radio_select"], field) and answer.lower() in ["yes", "no", "1", "0"]:
-                try:
-                    radio_buttons = self.get_child_elements(self.locator["radio_select"], field)
-
-                    if radio_buttons is None or len(radio_buttons) == 0:
-                        log.error(f"No radio buttons found for question: {question}")
-                        continue
-
-                    selected = False
-
-                    for radio_button in radio_buttons:
-                        if radio_button.get_attribute('value').lower() == answer.lower():
-                            WebDriverWait(field, 10).until(EC.element_to_be_clickable(radio_button))
-                            self.browser.execute_script("""
-                                arguments[0].click();
-                                arguments[0].dispatchEvent(new Event('change'));
-                            """, radio_button)
-                            log.info(f"Radio button selected: {radio_button.get_attribute('value')}")
-                            selected = True
-
-                    if not selected:
-                        log.info("Exact match not found, looking for closest answer...")
-                        closest_match = None
-                        for radio_button in radio_buttons:
-                            radio_value = radio_button.get_attribute('value').lower()
-                            if "yes" in radio_value or "no" in radio_value:
-                                closest_match = radio_button
-
-                        if closest_match:
-                            WebDriverWait(field, 10).until(EC.element_to_be_clickable(closest_match))
-                            self.browser.execute_script("""
-                                arguments[0].click();
-                                arguments[0].dispatchEvent(new Event('change'));
-                            """, closest_match)
-                            log.info(f"Closest radio button selected: {closest_match.get_attribute('value')}")
-                            
-                        else:
-                            log.warning("No suitable radio button found to select. Picking first option")
-                            firstOption = radio_buttons[0]
-                            WebDriverWait(field, 10).until(EC.element_to_be_clickable(firstOption))
-                            self.browser.execute_script("""
-                                arguments[0].click();
-                                arguments[0].dispatchEvent(new Event('change'));
-                            """, firstOption)
-                            
-                except StaleElementReferenceException:
-                    log.warning(f"Retrying due to stale element.")
-
-                except Exception as e:
-                    log.error(f"Radio button error for question: {question}, answer: {answer}")
-                    log.error(traceback.format_exc())  # Full traceback for better debugging
-                
-            # Multi-select case
-            elif self.is_found_field(self.locator["multi_select"], field):
-                max_retries = 5
-                retry_count = 0
-                while retry_count < max_retries:
-                    try:
-                        select_element = WebDriverWait(field, 10).until(
-                            EC.presence_of_element_located(self.locator["multi_select"])
-                        )
-
-                        foundChoice = False
-
-                        options = select_element.find_elements(By.TAG_NAME, "option")
-                        for option in options:
-                            if answer.lower() in option.text.strip().lower():
-                                option.click()
-                                foundChoice = True
-                                log.info(f"Option selected: {option.text}")
-                                break
-
-                        if foundChoice == False:
-                            options[1].click()
-                            log.info(f"1st Option selected: {options[1].text}")
-
-                        break  # Exit the loop if successful
-                    except StaleElementReferenceException:
-                        retry_count += 1
-                        log.warning(f"Retrying due to stale element. Attempt {retry_count}/{max_retries}")
-                    
-                    except Exception as e:
-                        retry_count += 1
-                        log.error(f"Multi-select error: {e}")
-                        break
-
-            # Handle text input fields
-            elif self.is_found_field(self.locator["text_select"], field):
-                try:
-                    
-                    text_field = WebDriverWait(field, 10).until(
-                            EC.presence_of_element_located(self.locator["text_select"])
-                        )
-                    time.sleep(3)
-                    text_field.clear()
-                    time.sleep(0.5)
-                    text_field.send_keys(answer)
-                    log.info(f"Text input field populated with: {answer}")
-                except Exception as e:
-                    log.error(f"(process_questions(1)) Text field error: {e}") 
-            # Hanlde textarea fields
-            elif self.is_found_field(self.locator["text_area"], field):
-                try:
-                    text_area = WebDriverWait(field, 10).until(
-                            EC.presence_of_element_located(self.locator["text_area"])
-                        )
-                    time.sleep(3)
-                    text_area.clear()
-                    time.sleep(0.5)
-                    text_area.send_keys(answer)
-                    log.info(f"Text input field populated with: {answer}")
-                except Exception as e:
-                    log.error(f"(process_questions(1)) Text field error: {e}")
-
-            # Handle fieldset fields
-            elif self.is_found_field(self.locator["input_select"], field):  # Adjust options as needed
-                try:
-                    select_elements = self.get_child_elements(self.locator["input_select"], field)
-
-                    if select_elements is None or len(select_elements) == 0:
-                        log.error(f"No select elements found for question: {question}")
-                        continue
-
-                    selected = False
-
-                    for select_element in select_elements:
-                        if answer.lower() in select_element.get_attribute('data-test-text-selectable-option__input').lower():
-                            WebDriverWait(field, 10).until(EC.element_to_be_clickable(select_element))
-                            select_element.click()  # Click instead of just setting the 'selected' attribute
-                            log.info(f"Select element chosen: {select_element.get_attribute('value')}")
-                            selected = True
-                            break  # Exit loop once the option is selected
-
-                    if not selected:
-                        log.info("Exact match not found, looking for closest answer...")
-                        closest_match = None
-                        for select_element in select_elements:
-                            select_value = select_element.get_attribute('value').lower()
-                            if "option1" in select_value or "option2" in select_value or "option3" in select_value:  # Adjust as needed
-                                closest_match = select_element
-                                break
-
-                        if closest_match:
-                            WebDriverWait(field, 10).until(EC.element_to_be_clickable(closest_match))
-                            closest_match.click()  # Use click for better simulation
-                            log.info(f"Closest select element chosen: {closest_match.get_attribute('value')}")
-                        else:
-                            log.warning("No suitable select option found. Picking the 2nd option")
-                            
-                            if len(select_elements) > 0:  # Ensure there is a 2nd option
-                                second_option = select_elements[1]
-                                WebDriverWait(field, 20).until(EC.element_to_be_clickable(second_option))
-
-                                second_option.click()  # Try to click instead of setting selected directly
-                                log.info(f"Second option selected: {second_option.get_attribute('value')}")
-                            else:
-                                log.error("Less than 2 options are available; unable to pick the 2nd option.")
-                                
-                except StaleElementReferenceException:
-                    log.warning(f"Retrying due to stale element.")
-
-                except Exception as e:
-                    log.error(f"Select element error for question: {question}, answer: {answer}")
-                    log.error(traceback.format_exc())  # Full traceback for better debugging
+        self.waiter.element(self.locator["fields"], timeout=5)
 
+        # one round trip to read the whole step, one to fill it
+        try:
+            form = self.browser.execute_script(FORM_SCHEMA_SCRIPT) or []
+        except Exception as e:
+            log.error("Could not read the form: %s", e)
+            return
+
+        log.debug("%d form fields", len(form))
+        actions = []
+        for field in form:
+            question = field["question"]
+            log.info("Processing question: %s", question)
+            answer = self.ans_question(question.lower())
+            log.info("Answer determined: %s", answer)
+
+            action = self.plan_field(field, answer)
+            if action is None:
+                log.info("Unable to determine field type for question: %s, moving to next field.", question)
             else:
-                log.info(f"Unable to determine field type for question: {question}, moving to next field.")
+                actions.append(action)
 
+        try:
+            filled = self.browser.execute_script(FILL_FORM_SCRIPT, actions)
+            log.info("Filled %s of %s fields", filled, len(form))
+        except Exception as e:
+            log.error("Could not fill the form: %s", e)
+
+    def plan_field(self, field, answer) -> dict | None:
+        answer = str(answer).strip()
+        wanted = answer.lower()
+        options = field["options"]
+        action = {"index": field["index"], "type": field["type"]}
+
+        if field["type"] in ("text", "textarea"):
+            if field["value"] == answer:
+                return None
+            action["value"] = answer
+            return action
+
+        if field["type"] == "select":
+            # option 0 is the "Select an option" placeholder
+            matches = [i for i, o in enumerate(options) if i > 0 and wanted in o["label"].lower()]
+            if matches:
+                action["option"] = matches[0]
+            elif len(options) > 1:
+                action["option"] = 1
+                log.info("1st Option selected: %s", options[1]['label'])
+            else:
+                return None
+            return action
+
+        if field["type"] in ("radio", "checkbox") and options:
+            exact = [i for i, o in enumerate(options) if wanted in (o["value"].lower(), o["label"].lower())]
+            partial = [i for i, o in enumerate(options) if wanted and wanted in o["label"].lower()]
+            closest = [i for i, o in enumerate(options)
+                       if "yes" in o["value"].lower() or "no" in o["value"].lower()]
+            if exact or partial:
+                action["option"] = (exact or partial)[0]
+            elif wanted in ("yes", "no", "1", "0") and closest:
+                log.info("Exact match not found, looking for closest answer...")
+                action["option"] = closest[-1]
+            else:
+                log.warning("No suitable option found to select. Picking first option")
+                action["option"] = 0
+            return action
 
+        return None
 
- 
-    def ans_question(self, question):  # refactor this to an ans.yaml file
-        answer = None
+    def ans_question(self, question):
         question = question.lower().strip()
-        choices = ["6", "5", "4", "3"]
-
-        # English proficiency-related questions
-        if "english" in question:
-            if "speak" in question or "communicate" in question:
-                answer = "Yes"
-            elif "proficiency" in question or "level" in question:
-                answer = "Native"
-
-        # Experience-related questions
-        elif "how many" in question and ("experience" in question or "years" in question):
-            answer = random.choice(choices)
-        elif "do you" in question and "experience" in question:
-            answer = "Yes"
-        elif "how did you hear" in question:
-            answer = "Other"
-        elif "refer" in question or "referred" in question:
-            answer = "N/A"
-        elif "why are you seeking" in question or ("why" in question and "this position"):
-            answer = "Good glassdoor reviews and the workers I talked to love their jobs"
-
-        # Work authorization questions
-        elif "work" in question and ("authorization" in question or "authorized" in question):
-            if "usc" in question:
-                answer = "USC: 0"
-            elif "status" in question:
-                answer = "U.S Citizen"
-        elif "W2" in question:
-            answer = "Yes"
-        elif ("eligible" in question or "able" in question) and "clearance" in question:
-            answer = "Yes"
-        elif ("have" in question or "obtain" in question or "obtained" in question) and "clearance" in question:
-            answer = "Yes"
-        elif ("US" in question or "U.S." in question or "green" in question ) and ("citizen" in question or "card" in question):
-            answer = "Yes"
-        # 
-        elif ("city" in question or "address" in question):
-            answer = "Bronx, New York, United States"
-        elif ("zip" in question or "area code" in question or "postal" in question):
-            answer = "10466"
-        elif ("first" in question):
-            answer = "Daeshaun"
-        elif ("last" in question):
-            answer = "Morrison"
-        # Socials
-        elif ("github" in question):
-            answer = "https://github.com/DMorrisonASC"
-        elif ("linkedin" in question):
-            answer = "https://www.linkedin.com/in/daeshaun-morrison-bab77b176/"
-
-        # Disability and drug test-related questions
-        elif "do you" in question and "disability" in question:
-            answer = "No"
-        elif "drug test" in question:
-            if "positive" in question:
-                answer = "No"
-            elif "can you" in question:
-                answer = "Yes"
-
-        # Commuting and legal questions
-        elif "can you" in question and "commute" in question:
-            answer = "Yes"
-        elif "criminal" in question or "felon" in question or "charged" in question:
-            answer = "No"
-
-        # Other personal questions
-        elif "currently reside" in question:
-            answer = "Yes"
-        elif "sponsor" in question:
-            answer = "No"
-        elif ("us citizen" in question or "u.s. citizen" in question) and "clearance" in question:
-            answer = "Yes"
-        elif "salary" in question:
-            answer = self.salary
-        elif "hourly" in question:
-            answer = "40"
-        elif "gender" in question:
-            answer = "Male"
-        elif "race" in question:
-            answer = "White"
-        elif "lgbtq" in question:
-            answer = "No"
-        elif "ethnicity" in question or "nationality" in question:
-            answer = "White"
-        elif "government" in question:
-            answer = "I do not wish to self-identify"
-        elif "are you legally" in question:
-            answer = "Yes"
-
-
-        # General affirmative questions
-        elif "do you" in question or "did you" in question or "have you" in question or "are you" in question:
-            answer = "Yes"
+        # learned answers first, then the heuristic rules
+        learned = self.answers.get(question)
+        answer = learned
+        if answer is None:
+            answer = self.answer_rules.answer(question)
+        if answer is None:
+            similar = self.similar.answer_key(question_key(question))
+            answer = self.answers.answers.get(similar) if similar else None
+
+        # Append question and answer to the CSV
+        if answer is not None and learned is None:
+            if self.answers.add(question, answer):
+                self.similar.add(question_key(question))
+            self.qa_log.write([question, answer])
 
         # Default case for unanswered questions
         if answer is None:
             log.info("Not able to answer question automatically. Please provide answer")
-            answer = "4"  # Placeholder for unanswered questions
-            time.sleep(5)
-
-        log.info("Answering question: " + question + " with answer: " + answer)
+            answer = FALLBACK_ANSWER
+            # logged without an answer so it can be filled in, never learned
+            key: str = question_key(question)
+            if learned is None and key not in self.answers.unanswered:
+                self.answers.unanswered.add(key)
+                self.qa_log.write([question, ""])
+
+        log.info("Answering question: %s with answer: %s", question, answer)
+        return answer
 
-        # Append question and answer to the CSV
-        if question not in self.answers:
-            self.answers[question] = answer
-            new_data = pd.DataFrame({"Question": [question], "Answer": [answer]})
-            new_data.to_csv(self.qa_file, mode='a', header=False, index=False, encoding='utf-8')
 
-        return answer
+    def navigate(self, url) -> None:
+        self.navigation += 1
+        self.browser.get(url)
 
+    def load_page(self, quiet=1) -> LazyPage:
+        # the page of the current navigation is only waited for once
+        if self.page is not None and self.page.navigation == self.navigation:
+            return self.page
+        self.wait_for_page(quiet)
+        self.page = LazyPage(self.browser, self.browser.current_url, self.navigation)
+        return self.page
 
-    def load_page(self, sleep=1):
-        scroll_page = 0
-        while scroll_page < 4000:
-            self.browser.execute_script("window.scrollTo(0," + str(scroll_page) + " );")
-            scroll_page += 500
-            time.sleep(sleep)
+    def wait_for_page(self, quiet=1) -> None:
+        self.waiter.ready()
+        self.browser.execute_script("for (var y = 0; y < 4000; y += 500) { window.scrollTo(0, y); }")
+        # lazy sections fire their requests on scroll, wait for them to land
+        self.waiter.network_idle(quiet=quiet, timeout=max(4 * quiet, 2))
 
-        if sleep != 1:
+        if quiet != 1:
             self.browser.execute_script("window.scrollTo(0,0);")
-            time.sleep(sleep)
-
-        page = BeautifulSoup(self.browser.page_source, "lxml")
-        return page
 
     def avoid_lock(self) -> None:
+        # needs a display, so only loaded when actually used
+        import pyautogui
         x, _ = pyautogui.position()
         pyautogui.moveTo(x + 200, pyautogui.position().y, duration=1.0)
         pyautogui.moveTo(x, pyautogui.position().y, duration=0.5)
@@ -972,6 +1166,7 @@ class EasyApplyBot:
         time.sleep(0.5)
         pyautogui.press('esc')
 
+    @phase("search_page")
     def next_jobs_page(self, position, location, jobs_per_page, experience_level=[], time_filter="24 hours"):
         # Construct the experience level part of the URL
         experience_level_str = ",".join(map(str, experience_level)) if experience_level else ""
@@ -987,13 +1182,13 @@ class EasyApplyBot:
         else:
             time_posted_param = ""  # No filter (Any time)
 
-        self.browser.get(
+        self.navigate(
             # URL for jobs page with Easy Apply, position, location, and time filter
-            "https://www.linkedin.com/jobs/search/?f_LF=f_AL&keywords=" +
+            self.BASE_URL + "/jobs/search/?f_LF=f_AL&keywords=" +
             position + location + "&start=" + str(jobs_per_page) + experience_level_param + time_posted_param
         )
 
-        log.info(f"Loading next job page with time filter: {time_filter}")
+        log.info("Loading next job page with time filter: %s", time_filter)
         self.load_page()
         return (self.browser, jobs_per_page)
 
@@ -1003,7 +1198,100 @@ class EasyApplyBot:
     #     self.browser.close()
 
 
+def apply_worker(bot_kwargs, combos, worker) -> None:
+    # runs in its own process with its own browser session
+    setupLogger()
+    log.info("Worker %s starting", worker)
+    bot = EasyApplyBot(**bot_kwargs)
+    bot.fill_data()
+    while True:
+        try:
+            position, location = combos.get(timeout=5)
+        except queue.Empty:
+            break
+        log.info("Worker %s applying to %s: %s", worker, position, location)
+        bot.applications_loop(position, "&location=" + location)
+    bot.results_log.flush()
+    bot.qa_log.flush()
+    bot.similar.save()
+    log.info("Worker %s finished, learned answers: %s, %s", worker, bot.answers.stats(), bot.similar.stats())
+
+
+def start_pool(bot_kwargs, positions, locations, workers) -> None:
+    # claims of workers killed by an earlier run would keep their jobs from
+    # every later one, give them back before any worker starts
+    store = AppliedJobStore(bot_kwargs["filename"])
+    released: int = store.release_claims()
+    store.close()
+    if released:
+        log.info("Released %d jobs claimed by an earlier run", released)
+    # Chrome does not survive a fork, start every worker from scratch
+    context = multiprocessing.get_context("spawn")
+    combos = context.Queue()
+    pairs: list = [(position, location) for position in positions for location in locations]
+    random.shuffle(pairs)
+    for combo in pairs:
+        combos.put(combo)
+
+    log.info("Starting %s workers for %s position/location combos", workers, len(pairs))
+    processes: list = [context.Process(target=apply_worker, args=(bot_kwargs, combos, n), name=f"worker-{n}")
+                       for n in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+def discover_worker(bot_kwargs, positions, locations, discovering, applying, max_pending) -> None:
+    setupLogger()
+    bot = EasyApplyBot(**bot_kwargs)
+    try:
+        bot.discover(positions, locations, JobQueue(bot.appliedJobIDs.db_path), max_pending, applying)
+    finally:
+        discovering.clear()
+        log.info("Discovery finished")
+
+
+def queue_worker(bot_kwargs, discovering, worker) -> None:
+    setupLogger()
+    bot = EasyApplyBot(**bot_kwargs)
+    bot.fill_data()
+    bot.drain_queue(JobQueue(bot.appliedJobIDs.db_path), discovering)
+    log.info("Application worker %s finished, learned answers: %s", worker, bot.answers.stats())
+
+
+def start_pipeline(bot_kwargs, positions, locations, appliers=1, max_pending=200) -> None:
+    # one browser discovers jobs while the others apply to them
+    # jobs left half done by an earlier run go back in line
+    JobQueue(Path(bot_kwargs["filename"]).with_suffix(".db")).requeue_taken()
+    context = multiprocessing.get_context("spawn")
+    discovering = context.Event()
+    discovering.set()
+    # cleared once every applier is gone, however it ended, so discovery stops waiting on them
+    applying = context.Event()
+    applying.set()
+    discovery = context.Process(target=discover_worker, name="discovery",
+                                args=(bot_kwargs, positions, locations, discovering, applying, max_pending))
+    processes: list = [context.Process(target=queue_worker, args=(bot_kwargs, discovering, n), name=f"applier-{n}")
+                       for n in range(appliers)]
+    for process in [discovery] + processes:
+        process.start()
+    for process in processes:
+        process.join()
+    applying.clear()
+    discovery.join()
+
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Apply to LinkedIn Easy Apply jobs")
+    parser.add_argument("--mode", choices=["run", "discover", "apply", "pipeline"], default="run",
+                        help="run: search and apply (default), discover: only queue jobs, "
+                             "apply: only apply to queued jobs, pipeline: discover and apply concurrently")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue an interrupted run from its checkpoint (run mode with one worker)")
+    args = parser.parse_args()
+    setupLogger()
+
     # all user info needed for the applying. Ex: username, password, 
     with open("config.yaml", 'r') as stream:
         try:
@@ -1029,6 +1317,7 @@ if __name__ == '__main__':
     output_filename: list = output_filename[0] if len(output_filename) > 0 else 'output.csv'
     blacklist = parameters.get('blacklist', [])
     blackListTitles = parameters.get('blackListTitles', [])
+    blackListLocations = parameters.get('blackListLocations', [])
 
     uploads = {} if parameters.get('uploads', {}) is None else parameters.get('uploads', {})
     for key in uploads.keys():
@@ -1037,15 +1326,42 @@ if __name__ == '__main__':
     locations: list = [l for l in parameters['locations'] if l is not None]
     positions: list = [p for p in parameters['positions'] if p is not None]
 
-    bot = EasyApplyBot(parameters['username'],
-                       parameters['password'],
-                       parameters['phone_number'],
-                       parameters['salary'],
-                       parameters['rate'], 
-                       uploads=uploads,
-                       filename=output_filename,
-                       blacklist=blacklist,
-                       blackListTitles=blackListTitles,
-                       experience_level=parameters.get('experience_level', [])
-                       )
-    bot.start_apply(positions, locations)
\ No newline at end of file
+    bot_kwargs: dict = dict(username=parameters['username'],
+                            password=parameters['password'],
+                            phone_number=parameters['phone_number'],
+                            salary=parameters['salary'],
+                            rate=parameters['rate'],
+                            uploads=uploads,
+                            filename=output_filename,
+                            blacklist=blacklist,
+                            blackListTitles=blackListTitles,
+                            blackListLocations=blackListLocations,
+                            experience_level=parameters.get('experience_level', []),
+                            profile_path=parameters.get('profile_path'),
+                            driver_path=parameters.get('driver_path'),
+                            lean=bool(parameters.get('lean'))
+                            )
+
+    workers: int = int(parameters.get('workers') or 1)
+    max_queued: int = int(parameters.get('max_queued') or 200)
+    if args.resume and (args.mode != "run" or workers > 1):
+        # the other modes keep their progress in the job queue already
+        parser.error("--resume only applies to --mode run with a single worker")
+    if args.mode == "pipeline":
+        start_pipeline(bot_kwargs, positions, locations, workers, max_queued)
+    elif args.mode in ("discover", "apply"):
+        jobs = JobQueue(Path(output_filename).with_suffix(".db"))
+        if args.mode == "apply":
+            # before the bot loads the applied jobs, so the released claims are not remembered
+            jobs.requeue_taken()
+        bot = EasyApplyBot(**bot_kwargs)
+        if args.mode == "discover":
+            bot.discover(positions, locations, jobs, max_pending=float("inf"))
+        else:
+            bot.fill_data()
+            bot.drain_queue(jobs)
+    elif workers > 1:
+        start_pool(bot_kwargs, positions, locations, workers)
+    else:
+        bot = EasyApplyBot(**bot_kwargs)
+        bot.start_apply(positions, locations, resume=args.resume)
\ No newline at end of file
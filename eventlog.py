@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+
+
+# Logging that never makes the bot wait on the disk. Loggers hand their
+# records to a queue; a listener thread formats them and writes a JSON line
+# per event to a size-rotated file, plus a readable line to the console.
+# Messages use %-style arguments, so a record below the level is dropped
+# before its message is ever built.
+
+MAX_BYTES = 10 * 2 ** 20
+BACKUP_COUNT = 5
+
+# fields a record may carry, set through `extra` or by EventContext
+FIELDS = ("jobID", "phase", "duration", "result")
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        event: dict = {
+            "time": self.formatTime(record, "%Y-%m-%d %H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "process": record.processName,
+            "message": record.getMessage(),
+        }
+        for field in FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                event[field] = value
+        if record.exc_info:
+            event["exception"] = self.formatException(record.exc_info)
+        return json.dumps(event, default=str)
+
+
+class EventContext(logging.Filter):
+    # stamps every record with the phase and job the bot is working on,
+    # taken from the Instrumentation attached to the running bot
+    metrics = None
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        metrics = self.metrics
+        if metrics is not None:
+            if getattr(record, "phase", None) is None:
+                record.phase = metrics.phases[-1]
+            if getattr(record, "jobID", None) is None and metrics.application is not None:
+                record.jobID = metrics.application["jobID"]
+        return True
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    # the stock handler builds the message before queueing it; leave that to
+    # the listener thread, the queue never leaves this process
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+CONTEXT = EventContext()
+
+
+def start(path, level=logging.INFO) -> logging.handlers.QueueListener:
+    file_handler = logging.handlers.RotatingFileHandler(path, maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT,
+                                                        encoding='utf-8')
+    file_handler.setFormatter(JsonFormatter())
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s', '%H:%M:%S'))
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(records, file_handler, console, respect_handler_level=True)
+    handler = DeferredQueueHandler(records)
+    handler.addFilter(CONTEXT)
+
+    root = logging.getLogger()
+    for old in root.handlers[:]:
+        root.removeHandler(old)
+    root.addHandler(handler)
+    root.setLevel(level)
+    listener.start()
+    # whatever is still queued is written on the way out
+    atexit.register(listener.stop)
+    return listener
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import logging
+from collections import Counter
+
+from answers import KeywordMatcher, normalize, normalize_keyword
+
+
+log = logging.getLogger(__name__)
+
+
+class JobFilter:
+    # Decides from a search result card alone whether a job is worth opening,
+    # so a blacklisted job never costs a page load. The keywords for each card
+    # field are compiled once into a KeywordMatcher and match whole words,
+    # ignoring case and punctuation: "Acme" catches "ACME, Inc." but not "Acmeware".
+
+    FIELDS = ("company", "title", "location")
+
+    def __init__(self, companies=(), titles=(), locations=()) -> None:
+        self.matchers: dict = {}
+        for field, keywords in zip(self.FIELDS, (companies, titles, locations)):
+            keywords = {" " + normalize_keyword(k).strip() + " " for k in keywords or () if k and str(k).strip()}
+            if keywords:
+                self.matchers[field] = KeywordMatcher(keywords)
+        self.skipped: Counter = Counter()
+
+    def reason(self, card: dict) -> str | None:
+        # why the job should be skipped, None if it passes
+        for field, matcher in self.matchers.items():
+            found: set = matcher.find(normalize(card.get(field) or ""))
+            if found:
+                self.skipped[field] += 1
+                return f"{field} matches blacklisted {', '.join(sorted(k.strip() for k in found))!r}"
+        return None
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import functools
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+import eventlog
+
+
+log = logging.getLogger(__name__)
+
+# Browser methods timed when the backend has no single WebDriver choke point
+BROWSER_METHODS = ("get", "find_element", "find_elements", "execute_script", "execute_async_script")
+
+
+def phase(name):
+    # decorator for EasyApplyBot methods, attributes their WebDriver calls to `name`
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.metrics.phase(name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class Instrumentation:
+    # Counts and times every WebDriver command and attributes it to the
+    # innermost active phase. Each application is written as one JSON line;
+    # running totals go to a Prometheus text file after every application.
+    # Phase times are inclusive of nested phases.
+
+    def __init__(self, jsonl_path=None, prom_path=None) -> None:
+        self.jsonl_path = jsonl_path
+        self.prom_path = prom_path
+        self.phases: list = ["other"]
+        self.commands: dict = defaultdict(lambda: [0, 0.0])
+        self.phase_seconds: dict = defaultdict(float)
+        self.results: dict = defaultdict(int)
+        self.application: dict | None = None
+
+    def attach(self, browser):
+        # log records of this process carry the current phase and job
+        eventlog.CONTEXT.metrics = self
+        # Selenium routes every driver and element command through driver.execute
+        driver = getattr(browser, "driver", None)
+        if driver is not None:
+            driver.execute = self._timed(driver.execute, None)
+        else:
+            for name in BROWSER_METHODS:
+                if hasattr(browser, name):
+                    setattr(browser, name, self._timed(getattr(browser, name), name))
+        return browser
+
+    def _timed(self, call, name):
+        def timed(*args, **kwargs):
+            start: float = time.perf_counter()
+            try:
+                return call(*args, **kwargs)
+            finally:
+                self.record(name or args[0], time.perf_counter() - start)
+        return timed
+
+    def record(self, command: str, seconds: float) -> None:
+        current: str = self.phases[-1]
+        totals = self.commands[(current, command)]
+        totals[0] += 1
+        totals[1] += seconds
+        if self.application is not None:
+            counts = self.application["commands"].setdefault(current, {}).setdefault(command, [0, 0.0])
+            counts[0] += 1
+            counts[1] += seconds
+
+    @contextmanager
+    def phase(self, name: str):
+        self.phases.append(name)
+        start: float = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed: float = time.perf_counter() - start
+            self.phases.pop()
+            log.debug("%s took %.3fs", name, elapsed, extra={"phase": name, "duration": round(elapsed, 3)})
+            self.phase_seconds[name] += elapsed
+            if self.application is not None:
+                seconds = self.application["phase_seconds"]
+                seconds[name] = seconds.get(name, 0.0) + elapsed
+
+    def start_application(self, jobID) -> None:
+        self.application = {"jobID": str(jobID), "start": time.perf_counter(), "commands": {}, "phase_seconds": {}}
+
+    def finish_application(self, result) -> None:
+        application, self.application = self.application, None
+        if application is None:
+            return
+        self.results[str(result).lower()] += 1
+        record: dict = {
+            "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            "jobID": application["jobID"],
+            "result": result,
+            "seconds": round(time.perf_counter() - application["start"], 3),
+            "commands": sum(count for commands in application["commands"].values() for count, _ in commands.values()),
+            "phase_seconds": {k: round(v, 3) for k, v in application["phase_seconds"].items()},
+            "phases": {p: {c: {"count": n, "seconds": round(s, 3)} for c, (n, s) in commands.items()}
+                       for p, commands in application["commands"].items()},
+        }
+        log.info("Application %s finished in %.1fs: %s", application["jobID"], record["seconds"], result,
+                 extra={"jobID": application["jobID"], "duration": record["seconds"], "result": result})
+        try:
+            for path in (self.jsonl_path, self.prom_path):
+                if path:
+                    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            if self.jsonl_path:
+                with open(self.jsonl_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record) + "\n")
+            self.write_prometheus()
+        except OSError as e:
+            log.error("Could not write metrics: %s", e)
+
+    def write_prometheus(self) -> None:
+        if not self.prom_path:
+            return
+        lines: list = [
+            "# HELP easyapply_webdriver_commands_total WebDriver commands sent, by phase and command.",
+            "# TYPE easyapply_webdriver_commands_total counter",
+        ]
+        lines += [f'easyapply_webdriver_commands_total{{phase="{p}",command="{c}"}} {n}'
+                  for (p, c), (n, _) in sorted(self.commands.items())]
+        lines += [
+            "# HELP easyapply_webdriver_command_seconds_total Time spent in WebDriver commands, by phase and command.",
+            "# TYPE easyapply_webdriver_command_seconds_total counter",
+        ]
+        lines += [f'easyapply_webdriver_command_seconds_total{{phase="{p}",command="{c}"}} {s:.6f}'
+                  for (p, c), (_, s) in sorted(self.commands.items())]
+        lines += [
+            "# HELP easyapply_phase_seconds_total Wall-clock time spent in each phase, nested phases included.",
+            "# TYPE easyapply_phase_seconds_total counter",
+        ]
+        lines += [f'easyapply_phase_seconds_total{{phase="{p}"}} {s:.6f}' for p, s in sorted(self.phase_seconds.items())]
+        lines += [
+            "# HELP easyapply_applications_total Applications attempted, by result.",
+            "# TYPE easyapply_applications_total counter",
+        ]
+        lines += [f'easyapply_applications_total{{result="{r}"}} {n}' for r, n in sorted(self.results.items())]
+
+        # write aside and rename so a scraper never reads a half written file
+        temporary: str = f"{self.prom_path}.tmp"
+        with open(temporary, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(temporary, self.prom_path)
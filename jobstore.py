@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import csv
+import logging
+import sqlite3
+import time
+from pathlib import Path
+
+
+log = logging.getLogger(__name__)
+
+
+class AppliedJobStore:
+    # SQLite record of every job we handled, mirrored into an in-memory set so
+    # membership checks cost nothing. The results CSV stays the human readable
+    # log; only the lines appended since the last start are imported.
+
+    def __init__(self, csv_path, db_path=None) -> None:
+        self.csv_path = Path(csv_path)
+        self.db_path = Path(db_path) if db_path else self.csv_path.with_suffix(".db")
+        # worker processes share the database, wait for each other's writes
+        self.db = sqlite3.connect(self.db_path, timeout=30)
+        self.db.execute("""CREATE TABLE IF NOT EXISTS jobs (
+                               job_id TEXT PRIMARY KEY, timestamp TEXT, job TEXT,
+                               company TEXT, attempted TEXT, result TEXT)""")
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.ids: set = {row[0] for row in self.db.execute("SELECT job_id FROM jobs")}
+        self.import_csv()
+        log.info("%s jobIDs found", len(self.ids))
+
+    def __contains__(self, jobID) -> bool:
+        return str(jobID) in self.ids
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def filter_new(self, jobIDs) -> list:
+        return [jobID for jobID in jobIDs if str(jobID) not in self.ids]
+
+    def claim(self, jobID) -> bool:
+        # Atomically reserve a job before applying. Goes to the database rather
+        # than the in-memory set, so two processes never get the same job.
+        jobID = str(jobID)
+        if jobID in self.ids:
+            return False
+        cursor = self.db.execute("INSERT OR IGNORE INTO jobs (job_id, result) VALUES (?, 'claimed')", (jobID,))
+        self.db.commit()
+        self.ids.add(jobID)
+        return cursor.rowcount == 1
+
+    def release(self, jobID) -> bool:
+        # give back a claim whose application never finished, e.g. after a crash
+        jobID = str(jobID)
+        cursor = self.db.execute("DELETE FROM jobs WHERE job_id = ? AND result = 'claimed'", (jobID,))
+        self.db.commit()
+        if cursor.rowcount == 1:
+            self.ids.discard(jobID)
+        return cursor.rowcount == 1
+
+    def release_claims(self) -> int:
+        # every claim left by workers that died mid application; only safe
+        # while no other process is applying
+        claimed: list = [row[0] for row in self.db.execute("SELECT job_id FROM jobs WHERE result = 'claimed'")]
+        self.db.execute("DELETE FROM jobs WHERE result = 'claimed'")
+        self.db.commit()
+        self.ids.difference_update(claimed)
+        return len(claimed)
+
+    def add(self, jobID, timestamp, job, company, attempted, result) -> None:
+        self._upsert([(str(jobID), timestamp, job, company, str(attempted), str(result))])
+
+    def import_csv(self) -> int:
+        if not self.csv_path.is_file():
+            return 0
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'csv_offset'").fetchone()
+        offset: int = int(row[0]) if row else 0
+        if self.csv_path.stat().st_size < offset:
+            # the results file was truncated or replaced, start over
+            offset = 0
+
+        with open(self.csv_path, 'rb') as f:
+            f.seek(offset)
+            data: bytes = f.read()
+        # only consume complete lines, a half written row is picked up next time
+        end: int = data.rfind(b'\n') + 1
+        if end == 0:
+            return 0
+
+        rows: list = []
+        for record in csv.reader(data[:end].decode('utf-8', errors='replace').splitlines()):
+            if len(record) >= 2 and record[1]:
+                # CSV columns are timestamp, jobID, job, company, attempted, result
+                rows.append((record[1], record[0]) + tuple((record[2:] + [''] * 4)[:4]))
+        self._upsert(rows, commit=False)
+        self.db.execute("INSERT OR REPLACE INTO meta VALUES ('csv_offset', ?)", (str(offset + end),))
+        self.db.commit()
+        return len(rows)
+
+    def close(self) -> None:
+        self.db.close()
+
+    def _upsert(self, rows, commit=True) -> None:
+        self.db.executemany("INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?)", rows)
+        if commit:
+            self.db.commit()
+        self.ids.update(row[0] for row in rows)
+
+
+class JobQueue:
+    # Persistent FIFO of discovered jobs, stored next to the applied jobs.
+    # Discovery pushes, application pops; both may run in different processes
+    # or at different times.
+
+    def __init__(self, db_path) -> None:
+        self.db_path = Path(db_path)
+        # autocommit, pop() manages its own transaction
+        self.db = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        self.db.execute("""CREATE TABLE IF NOT EXISTS queue (
+                               job_id TEXT PRIMARY KEY, position TEXT, location TEXT, title TEXT,
+                               company TEXT, place TEXT, discovered REAL,
+                               state TEXT DEFAULT 'pending', result TEXT)""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS queue_state ON queue (state, discovered)")
+
+    def push(self, cards, position, location) -> int:
+        before: int = self.db.total_changes
+        self.db.executemany("INSERT OR IGNORE INTO queue (job_id, position, location, title, company, place, discovered) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            [(str(card["jobID"]), position, location, card.get("title"), card.get("company"),
+                              card.get("location"), time.time()) for card in cards])
+        return self.db.total_changes - before
+
+    def pop(self) -> dict | None:
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.db.execute("SELECT job_id, position, location, title, company, place FROM queue "
+                                  "WHERE state = 'pending' ORDER BY discovered LIMIT 1").fetchone()
+            if row is not None:
+                self.db.execute("UPDATE queue SET state = 'taken' WHERE job_id = ?", (row[0],))
+        finally:
+            self.db.execute("COMMIT")
+        if row is None:
+            return None
+        return dict(zip(("jobID", "position", "search_location", "title", "company", "location"), row))
+
+    def done(self, jobID, result) -> None:
+        self.db.execute("UPDATE queue SET state = 'done', result = ? WHERE job_id = ?", (str(result), str(jobID)))
+
+    def pending(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM queue WHERE state = 'pending'").fetchone()[0]
+
+    def requeue_taken(self) -> int:
+        # jobs taken by an application stage that died before finishing them,
+        # their claims in the applied jobs table go too or claim() refuses them
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            if self.db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'jobs'").fetchone():
+                self.db.execute("DELETE FROM jobs WHERE result = 'claimed' AND job_id IN "
+                                "(SELECT job_id FROM queue WHERE state = 'taken')")
+            requeued: int = self.db.execute("UPDATE queue SET state = 'pending' WHERE state = 'taken'").rowcount
+        finally:
+            self.db.execute("COMMIT")
+        return requeued
+
+    def close(self) -> None:
+        self.db.close()
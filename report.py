@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import argparse
+import sqlite3
+from pathlib import Path
+
+import pandas as pd
+
+
+# Offline report over the application history: the results CSVs the bot
+# writes (output.csv, out.csv, ...) and the searches and queue tables kept
+# next to them. Every table is also written as CSV to --out.
+
+COLUMNS = ["timestamp", "jobID", "job", "company", "attempted", "result", "reason"]
+CHUNK_ROWS = 100_000
+
+# older rows have no reason column, name what attempted/result can tell
+DERIVED_REASONS = {
+    (False, False): "No Easy Apply button or already applied (not recorded)",
+    (True, False): "Did not apply (not recorded)",
+    (True, True): "Applied: Sent Resume",
+}
+
+
+def as_bool(column: pd.Series) -> pd.Series:
+    return column.astype(str).str.strip().str.lower().eq("true")
+
+
+def load_results(paths) -> pd.DataFrame:
+    # read in chunks and keep only compact columns, so large histories fit
+    frames: list = []
+    for path in paths:
+        for chunk in pd.read_csv(path, header=None, names=COLUMNS, dtype=str, chunksize=CHUNK_ROWS,
+                                 keep_default_na=False, on_bad_lines="skip"):
+            frame = pd.DataFrame({
+                "timestamp": pd.to_datetime(chunk["timestamp"], errors="coerce"),
+                "jobID": chunk["jobID"].str.strip(),
+                "company": chunk["company"].str.strip().astype("category"),
+                "attempted": as_bool(chunk["attempted"]),
+                "applied": as_bool(chunk["result"]),
+                "reason": chunk["reason"].str.strip(),
+            })
+            frames.append(frame[frame["timestamp"].notna() & frame["jobID"].ne("")])
+    if not frames:
+        return pd.DataFrame(columns=["timestamp", "jobID", "company", "attempted", "applied", "reason", "day", "hour"])
+    results = pd.concat(frames, ignore_index=True)
+    results["company"] = results["company"].astype(str)
+
+    derived = pd.Series([DERIVED_REASONS[key] for key in zip(results["attempted"], results["applied"])],
+                        index=results.index, dtype=object) if len(results) else results["reason"]
+    results["reason"] = results["reason"].where(results["reason"].ne(""), derived)
+    results["day"] = results["timestamp"].dt.date
+    results["hour"] = results["timestamp"].dt.hour
+    return results.sort_values("timestamp", kind="stable", ignore_index=True)
+
+
+def load_combos(db_path) -> pd.DataFrame:
+    # run mode records every search, discover/apply modes keep the job queue
+    columns = ["position", "location", "searches", "minutes", "new_jobs", "submitted"]
+    if not Path(db_path).is_file():
+        return pd.DataFrame(columns=columns)
+    with sqlite3.connect(db_path) as db:
+        tables = {row[0] for row in db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        frames: list = []
+        if "searches" in tables:
+            frames.append(pd.read_sql_query(
+                "SELECT position, location, COUNT(*) AS searches, SUM(seconds) / 60.0 AS minutes, "
+                "SUM(new_jobs) AS new_jobs, SUM(submitted) AS submitted FROM searches "
+                "GROUP BY position, location", db))
+        if "queue" in tables:
+            frames.append(pd.read_sql_query(
+                "SELECT position, location, 0 AS searches, 0.0 AS minutes, COUNT(*) AS new_jobs, "
+                "SUM(result = 'True') AS submitted FROM queue WHERE state = 'done' "
+                "GROUP BY position, location", db))
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    combos = pd.concat(frames).groupby(["position", "location"], as_index=False).sum()
+    combos["minutes"] = combos["minutes"].round(1)
+    combos["success_rate"] = (combos["submitted"] / combos["new_jobs"].where(combos["new_jobs"] > 0)).round(3)
+    combos["per_hour"] = (combos["submitted"] / (combos["minutes"] / 60).where(combos["minutes"] > 0)).round(1)
+    return combos.sort_values("per_hour", ascending=False, na_position="last", ignore_index=True)
+
+
+def rates(results: pd.DataFrame, by) -> pd.DataFrame:
+    table = results.groupby(by, observed=True).agg(attempts=("jobID", "size"), applied=("applied", "sum"))
+    table["success_rate"] = (table["applied"] / table["attempts"]).round(3)
+    return table
+
+
+def report(results: pd.DataFrame, combos: pd.DataFrame, top: int = 20) -> dict:
+    active_hours = results[["day", "hour"]].drop_duplicates()
+    attempts_per_job = results["jobID"].value_counts()
+    applied_jobs = results.loc[results["applied"], "jobID"].value_counts()
+
+    per_day = rates(results, "day")
+    per_day["active_hours"] = active_hours.groupby("day").size()
+    per_day["applied_per_hour"] = (per_day["applied"] / per_day["active_hours"]).round(1)
+
+    per_hour = results.groupby(["day", "hour"]).agg(attempts=("jobID", "size"), applied=("applied", "sum"))
+
+    reasons = results["reason"].value_counts().rename_axis("reason").to_frame("attempts")
+    reasons["share"] = (reasons["attempts"] / len(results)).round(3) if len(results) else 0.0
+
+    summary = pd.Series({
+        "first": results["timestamp"].min(),
+        "last": results["timestamp"].max(),
+        "attempts": len(results),
+        "distinct jobs": results["jobID"].nunique(),
+        "applied": int(results["applied"].sum()),
+        "success rate": round(results["applied"].mean(), 3) if len(results) else None,
+        "active hours": len(active_hours),
+        "applied per active hour": round(results["applied"].sum() / len(active_hours), 1) if len(active_hours) else None,
+        "jobs attempted more than once": int((attempts_per_job > 1).sum()),
+        "repeated attempts": int((attempts_per_job - 1).sum()),
+        "jobs applied to more than once": int((applied_jobs > 1).sum()),
+    }).to_frame("value")
+
+    return {
+        "summary": summary,
+        "per_day": per_day,
+        "per_hour": per_hour,
+        "hour_of_day": rates(results, "hour"),
+        "companies": rates(results, "company").sort_values("attempts", ascending=False).head(top),
+        "combos": combos,
+        "reasons": reasons,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Report on the application history")
+    parser.add_argument("results", nargs="*", type=Path, default=[Path("output.csv")],
+                        help="results CSVs written by the bot (default output.csv)")
+    parser.add_argument("--db", type=Path, default=None,
+                        help="searches and queue database (default: the first results CSV with a .db suffix)")
+    parser.add_argument("--out", type=Path, default=Path("report"), help="directory for the CSV tables")
+    parser.add_argument("--top", type=int, default=20, help="companies to list")
+    args = parser.parse_args()
+
+    found: list = [path for path in args.results if path.is_file()]
+    if not found:
+        parser.error(f"no results file found: {', '.join(map(str, args.results))}")
+    results = load_results(found)
+    combos = load_combos(args.db or args.results[0].with_suffix(".db"))
+    tables = report(results, combos, args.top)
+
+    args.out.mkdir(parents=True, exist_ok=True)
+    with pd.option_context("display.width", 160, "display.max_rows", 200):
+        for name, table in tables.items():
+            table.to_csv(args.out / f"{name}.csv")
+            if name != "per_hour":
+                print(f"\n== {name.replace('_', ' ')} ==")
+                print(table.to_string() if len(table) else "(no data)")
+    print(f"\nTables written to {args.out}/")
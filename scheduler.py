@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import logging
+import random
+import sqlite3
+import time
+from datetime import datetime
+
+
+log = logging.getLogger(__name__)
+
+
+class ComboScheduler:
+    # Hands out (position, location, seconds) searches for a run. Each combo's
+    # yield is its submitted applications per minute over past searches,
+    # smoothed with an optimistic prior so combos never searched get a turn.
+    # Time is shared out in proportion to yield; a combo whose search came
+    # back dry is not searched again this run, productive ones are revisited
+    # while time remains.
+
+    PRIOR_SUBMITTED = 1.0
+    PRIOR_MINUTES = 5.0
+    HISTORY_DAYS = 30
+
+    def __init__(self, db_path, positions, locations, total_time: float, max_budget: float,
+                 min_budget: float = 120, max_visits: int = 3) -> None:
+        self.db = sqlite3.connect(db_path, timeout=30)
+        self.db.execute("""CREATE TABLE IF NOT EXISTS searches (
+                               position TEXT, location TEXT, started TEXT, seconds REAL,
+                               new_jobs INTEGER, submitted INTEGER)""")
+        self.db.commit()
+        self.combos: list = [(position, location) for position in positions for location in locations]
+        random.shuffle(self.combos)
+        self.total_time = total_time
+        self.max_budget = max_budget
+        self.min_budget = min_budget
+        self.max_visits = max_visits
+        self.visits: dict = {combo: 0 for combo in self.combos}
+        self.dry: set = set()
+        self.history: dict = {combo: [0, 0.0] for combo in self.combos}
+        for position, location, submitted, seconds in self.db.execute(
+                "SELECT position, location, SUM(submitted), SUM(seconds) FROM searches "
+                "WHERE started > datetime('now', 'localtime', ?) GROUP BY position, location",
+                (f"-{self.HISTORY_DAYS} days",)):
+            if (position, location) in self.history:
+                self.history[(position, location)] = [submitted or 0, seconds or 0.0]
+        self.start: float | None = None
+        self.elapsed: float = 0.0
+
+    def yield_of(self, combo) -> float:
+        submitted, seconds = self.history[combo]
+        return (submitted + self.PRIOR_SUBMITTED) / (seconds / 60 + self.PRIOR_MINUTES)
+
+    def state(self) -> dict:
+        # what a resumed run needs to carry on with the same schedule
+        return {"elapsed": time.time() - self.start if self.start else self.elapsed,
+                "visits": [[position, location, n] for (position, location), n in self.visits.items()],
+                "dry": [list(combo) for combo in self.dry]}
+
+    def restore(self, state: dict) -> None:
+        self.elapsed = state.get("elapsed", 0.0)
+        for position, location, n in state.get("visits", []):
+            if (position, location) in self.visits:
+                self.visits[(position, location)] = n
+        self.dry.update(tuple(combo) for combo in state.get("dry", []) if tuple(combo) in self.visits)
+
+    def __iter__(self):
+        # a resumed schedule keeps counting from where the crashed run was
+        self.start = time.time() - self.elapsed
+        # a run shorter than min_budget still gets its searches
+        floor: float = min(self.min_budget, self.max_budget, self.total_time)
+        while True:
+            remaining: float = self.total_time - (time.time() - self.start)
+            candidates: list = [combo for combo in self.combos
+                                if combo not in self.dry and self.visits[combo] < self.max_visits]
+            if remaining <= 0 or not candidates:
+                return
+            # combos searched less often this run come first, then by yield
+            combo = max(candidates, key=lambda c: (-self.visits[c], self.yield_of(c)))
+            share: float = self.yield_of(combo) / sum(self.yield_of(c) for c in candidates)
+            budget: float = min(max(remaining * share, floor), self.max_budget, remaining)
+            self.visits[combo] += 1
+            yield combo[0], combo[1], budget
+
+    def record(self, position, location, seconds: float, new_jobs: int, submitted: int) -> None:
+        combo: tuple = (position, location)
+        if new_jobs == 0:
+            self.dry.add(combo)
+        self.history[combo][0] += submitted
+        self.history[combo][1] += seconds
+        self.db.execute("INSERT INTO searches VALUES (?, ?, ?, ?, ?, ?)",
+                        (position, location, datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                         seconds, new_jobs, submitted))
+        self.db.commit()
+        log.info("%s: %s gave %s new jobs and %s applications in %.1f minutes, yield now %.2f/min",
+                 position, location, new_jobs, submitted, seconds / 60, self.yield_of(combo))
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import zlib
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from answers import normalize
+
+
+log = logging.getLogger(__name__)
+
+
+class SimilarityIndex:
+    # Nearest neighbour search over the learned questions, for questions no
+    # rule or exact match answers. Questions are TF-IDF vectors of hashed
+    # character n-grams, stored as an inverted index (feature -> questions)
+    # so a lookup only touches the questions sharing an n-gram with it.
+    # The index is saved as .npy files and memory-mapped on the next start;
+    # questions learned since are kept in a small delta searched alongside
+    # and folded in by save().
+
+    FEATURES = 2 ** 18
+    NGRAMS = (3, 4)
+    THRESHOLD = 0.8
+    # n-grams in more than this share of the questions ("you", "ave") say
+    # little and would make every lookup visit most of the index
+    MAX_DF = 0.05
+    CACHE_SIZE = 4096
+    FILES = ("indptr", "rows", "weights", "df")
+
+    def __init__(self, directory) -> None:
+        self.directory = Path(directory)
+        self.keys: list = []
+        self.known: set = set()
+        self.indptr = np.zeros(self.FEATURES + 1, dtype=np.int64)
+        self.rows = np.zeros(0, dtype=np.int32)
+        self.weights = np.zeros(0, dtype=np.float32)
+        self.df = np.zeros(self.FEATURES, dtype=np.int32)
+        self.delta: dict = {}
+        self.cache: dict = {}
+        self.hits: int = 0
+        self.misses: int = 0
+
+    @classmethod
+    def load_or_build(cls, directory, keys) -> SimilarityIndex:
+        index = cls(directory)
+        keys = list(keys)
+        if not index.load(keys):
+            index.build(keys)
+            index.save()
+        return index
+
+    def features(self, key: str) -> Counter:
+        text: str = normalize(key)
+        return Counter(zlib.crc32(text[i:i + n].encode('utf-8')) % self.FEATURES
+                       for n in self.NGRAMS for i in range(len(text) - n + 1))
+
+    def idf(self, features) -> np.ndarray:
+        return np.log((1 + len(self.keys)) / (1 + self.df[features])) + 1
+
+    def vector(self, key: str) -> tuple:
+        # sorted feature ids and their unit length TF-IDF weights
+        counts: Counter = self.features(key)
+        features = np.fromiter(sorted(counts), dtype=np.int64, count=len(counts))
+        features = features[self.df[features] <= max(self.MAX_DF * len(self.keys), 10)]
+        weights = np.log1p(np.fromiter((counts[f] for f in features.tolist()), dtype=np.float32, count=len(features)))
+        weights = weights * self.idf(features)
+        norm: float = float(np.sqrt(np.dot(weights, weights)))
+        return features, (weights / norm if norm else weights).astype(np.float32)
+
+    def build(self, keys) -> None:
+        self.keys = list(dict.fromkeys(keys))
+        self.known = set(self.keys)
+        self.delta = {}
+        self.cache = {}
+        counts: list = [self.features(key) for key in self.keys]
+        self.df = np.zeros(self.FEATURES, dtype=np.int32)
+        for features in counts:
+            self.df[list(features)] += 1
+
+        rows: list = []
+        features: list = []
+        weights: list = []
+        for row, key in enumerate(self.keys):
+            f, w = self.vector(key)
+            rows.append(np.full(len(f), row, dtype=np.int32))
+            features.append(f)
+            weights.append(w)
+        rows = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int32)
+        features = np.concatenate(features) if features else np.zeros(0, dtype=np.int64)
+        weights = np.concatenate(weights) if weights else np.zeros(0, dtype=np.float32)
+
+        # group the entries by feature: a CSR matrix of features x questions
+        order = np.argsort(features, kind='stable')
+        self.rows = rows[order]
+        self.weights = weights[order]
+        self.indptr = np.zeros(self.FEATURES + 1, dtype=np.int64)
+        np.cumsum(np.bincount(features, minlength=self.FEATURES), out=self.indptr[1:])
+        log.info("Built the similarity index of %s learned questions", len(self.keys))
+
+    @staticmethod
+    def fingerprint(keys) -> str:
+        return hashlib.blake2b("\n".join(keys).encode('utf-8'), digest_size=16).hexdigest()
+
+    def load(self, keys: list) -> bool:
+        # reuse the saved index if it covers exactly these questions
+        try:
+            meta: dict = json.loads((self.directory / "meta.json").read_text(encoding='utf-8'))
+            if meta.get("features") != self.FEATURES or meta.get("fingerprint") != self.fingerprint(keys):
+                return False
+            arrays: dict = {name: np.load(self.directory / f"{name}.npy", mmap_mode='r') for name in self.FILES}
+        except (OSError, ValueError):
+            return False
+        if len(arrays["rows"]) != meta.get("entries") or len(arrays["indptr"]) != self.FEATURES + 1:
+            return False
+        self.keys = list(keys)
+        self.known = set(self.keys)
+        self.indptr, self.rows, self.weights, self.df = (arrays[name] for name in self.FILES)
+        log.info("Loaded the similarity index of %s learned questions", len(self.keys))
+        return True
+
+    def save(self) -> None:
+        if self.delta:
+            self.build(self.keys + list(self.delta))
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            for name in self.FILES:
+                # write aside and rename so a reader never maps a half written file
+                temporary: Path = self.directory / f"{name}.tmp.npy"
+                np.save(temporary, np.asarray(getattr(self, name)))
+                os.replace(temporary, self.directory / f"{name}.npy")
+            meta: dict = {"features": self.FEATURES, "fingerprint": self.fingerprint(self.keys),
+                          "entries": len(self.rows)}
+            (self.directory / "meta.json").write_text(json.dumps(meta), encoding='utf-8')
+        except OSError as e:
+            log.error("Could not save the similarity index: %s", e)
+
+    def add(self, key: str) -> None:
+        if not key or key in self.known or key in self.delta:
+            return
+        # rebuilding is left to save(), never in the middle of filling a form
+        self.delta[key] = self.vector(key)
+        self.cache.clear()
+
+    def nearest(self, question: str) -> tuple:
+        # the most similar learned question and its cosine similarity
+        if question in self.cache:
+            return self.cache[question]
+        features, weights = self.vector(question)
+        best: tuple = (None, 0.0)
+        if len(self.keys):
+            starts, ends = self.indptr[features], self.indptr[features + 1]
+            found = ends > starts
+            if found.any():
+                # gather the postings of every feature of the question in one go
+                lengths = (ends - starts)[found]
+                positions = np.repeat(starts[found] - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+                rows = self.rows[positions]
+                products = self.weights[positions] * np.repeat(weights[found], lengths)
+                scores = np.bincount(rows, weights=products, minlength=len(self.keys))
+                row = int(np.argmax(scores))
+                best = (self.keys[row], float(scores[row]))
+        for key, (f, w) in self.delta.items():
+            _, mine, theirs = np.intersect1d(features, f, assume_unique=True, return_indices=True)
+            score = float(np.dot(weights[mine], w[theirs]))
+            if score > best[1]:
+                best = (key, score)
+        if len(self.cache) >= self.CACHE_SIZE:
+            self.cache.clear()
+        self.cache[question] = best
+        return best
+
+    def answer_key(self, question: str) -> str | None:
+        # the learned question close enough to answer this one, if any
+        key, score = self.nearest(question)
+        if key is not None and score >= self.THRESHOLD:
+            self.hits += 1
+            log.debug("%r looks like %r (%.2f)", question, key, score)
+            return key
+        self.misses += 1
+        return None
+
+    def stats(self) -> str:
+        return f"{self.hits} similar questions answered, {self.misses} without a close match"
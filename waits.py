@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import logging
+import time
+
+from selenium.common.exceptions import TimeoutException
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+
+log = logging.getLogger(__name__)
+
+
+# Resolves once `root` has seen no DOM mutations (and, optionally, no new
+# network resources) for `quiet` ms, or when the deadline passes.
+IDLE_SCRIPT = """
+var root = arguments[0] || document.documentElement;
+var quiet = arguments[1], deadline = Date.now() + arguments[2], watchNetwork = arguments[3];
+var done = arguments[arguments.length - 1];
+var last = Date.now(), resources = performance.getEntriesByType('resource').length;
+var observer = new MutationObserver(function () { last = Date.now(); });
+observer.observe(root, {childList: true, subtree: true, attributes: true, characterData: true});
+var timer = setInterval(function () {
+    if (watchNetwork) {
+        var count = performance.getEntriesByType('resource').length;
+        if (count !== resources) { resources = count; last = Date.now(); }
+    }
+    var now = Date.now();
+    if (now - last >= quiet || now >= deadline) {
+        clearInterval(timer);
+        observer.disconnect();
+        done(now - last >= quiet);
+    }
+}, 50);
+"""
+
+
+class PageWaiter:
+    # Every wait has a deadline and returns as soon as its condition holds,
+    # so callers never pay for a worst-case constant sleep.
+
+    def __init__(self, browser, timeout: float = 30, poll: float = 0.1) -> None:
+        self.browser = browser
+        self.timeout = timeout
+        self.poll = poll
+        self.waited: float = 0.0
+        # async idle scripts must be allowed to outlive their own deadline
+        self.browser.set_script_timeout(timeout + 5)
+
+    def until(self, condition, timeout: float | None = None, waiter=None):
+        start: float = time.time()
+        try:
+            return WebDriverWait(waiter or self.browser, self.timeout if timeout is None else timeout,
+                                 poll_frequency=self.poll).until(condition)
+        except TimeoutException:
+            return None
+        finally:
+            self.waited += time.time() - start
+
+    def element(self, locator, timeout: float | None = None, clickable: bool = False, within=None):
+        condition = EC.element_to_be_clickable(locator) if clickable else EC.presence_of_element_located(locator)
+        return self.until(condition, timeout, waiter=within)
+
+    def ready(self, timeout: float | None = None) -> bool:
+        return self.until(lambda d: d.execute_script("return document.readyState") != "loading",
+                          timeout) is not None
+
+    def dom_idle(self, quiet: float = 0.5, timeout: float | None = None, root=None) -> bool:
+        return self._idle(quiet, timeout, root, False)
+
+    def network_idle(self, quiet: float = 0.5, timeout: float | None = None) -> bool:
+        return self._idle(quiet, timeout, None, True)
+
+    def _idle(self, quiet, timeout, root, watch_network) -> bool:
+        timeout = min(self.timeout if timeout is None else timeout, self.timeout)
+        start: float = time.time()
+        try:
+            return bool(self.browser.execute_async_script(IDLE_SCRIPT, root, int(quiet * 1000),
+                                                          int(timeout * 1000), watch_network))
+        except WebDriverException as e:
+            log.debug("Idle wait aborted: %s", e)
+            return False
+        finally:
+            self.waited += time.time() - start
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import atexit
+import csv
+import io
+import logging
+import os
+import threading
+import time
+
+
+log = logging.getLogger(__name__)
+
+
+class BufferedCSVWriter:
+    # Write-behind CSV log. Rows are buffered in memory and appended in one
+    # write + fsync when the buffer fills, when the oldest row is max_delay
+    # seconds old, or on shutdown. Each flush is a single append so a crash
+    # never leaves a batch half written.
+
+    def __init__(self, path, max_records: int = 50, max_delay: float = 5.0) -> None:
+        self.path = path
+        self.max_records = max_records
+        self.max_delay = max_delay
+        self.rows: list = []
+        self.oldest: float = 0.0
+        self.lock = threading.Lock()
+        self.closed = threading.Event()
+        self.flusher = threading.Thread(target=self._flush_periodically, name=f"flush {path}", daemon=True)
+        self.flusher.start()
+        atexit.register(self.close)
+
+    def write(self, row) -> None:
+        with self.lock:
+            if not self.rows:
+                self.oldest = time.time()
+            self.rows.append(list(row))
+            full: bool = len(self.rows) >= self.max_records
+        if full:
+            self.flush()
+
+    def flush(self) -> int:
+        with self.lock:
+            rows, self.rows = self.rows, []
+            if not rows:
+                return 0
+            buffer = io.StringIO()
+            csv.writer(buffer, lineterminator='\n').writerows(rows)
+            data: bytes = buffer.getvalue().encode('utf-8')
+            try:
+                fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    os.write(fd, data)
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+            except OSError as e:
+                # keep the rows for the next attempt rather than losing them
+                self.rows = rows + self.rows
+                log.error("Could not write %s rows to %s: %s", len(rows), self.path, e)
+                return 0
+        return len(rows)
+
+    def close(self) -> None:
+        if not self.closed.is_set():
+            self.closed.set()
+            self.flush()
+
+    def _flush_periodically(self) -> None:
+        while not self.closed.wait(self.max_delay / 2):
+            if self.rows and time.time() - self.oldest >= self.max_delay:
+                self.flush()